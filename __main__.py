@@ -0,0 +1,8 @@
+"""
+SQLite MCP服务器统一入口 - 用法: python . --mode {stdio,enhanced,natural,network,simple,standard,standard_network}
+"""
+from mcp.launcher import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+日志配置模块 - 各入口脚本共享的日志初始化
+"""
+import logging
+import sys
+from functools import lru_cache
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+@lru_cache(maxsize=1)
+def configure(level: str = "INFO") -> None:
+    """
+    配置根日志（每个进程只执行一次，日志输出到stderr以免干扰stdio通信）
+    
+    Args:
+        level: 日志级别名称，如 "INFO"、"DEBUG"
+    """
+    logging.basicConfig(
+        level=getattr(logging, level.upper(), logging.INFO),
+        format=LOG_FORMAT,
+        handlers=[
+            logging.StreamHandler(sys.stderr),
+        ]
+    )
@@ -1,33 +1,48 @@
 """
 应用配置管理模块
 """
-import os
+from functools import lru_cache
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    """应用配置类"""
-    
-    # 数据库配置
-    database_path: str = os.getenv("DATABASE_PATH", "data/restaurants.db")
-    
-    # 初始化配置
-    init_script: Optional[str] = os.getenv("INIT_SCRIPT")
-    
-    # 日志配置
-    log_level: str = os.getenv("LOG_LEVEL", "INFO")
-    
+    """应用配置类（字段值由pydantic-settings从环境变量/.env自动读取）"""
+
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+
+    # 数据库配置（环境变量 DATABASE_PATH）
+    database_path: str = "data/restaurants.db"
+
+    # 初始化配置（环境变量 INIT_SCRIPT）
+    init_script: Optional[str] = None
+
+    # 数据库调用线程池大小（环境变量 DB_POOL_SIZE）
+    db_pool_size: int = 4
+
+    # 日志配置（环境变量 LOG_LEVEL）
+    log_level: str = "INFO"
+
     # MCP配置
     server_name: str = "sqlite-mcp-server"
     server_version: str = "1.0.0"
     mcp_server_name: str = "sqlite-mcp-server"
     mcp_server_version: str = "1.0.0"
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+
+    # Agent配置（环境变量 AGENT_ID、USE_THREAD_SAFE）
+    agent_id: Optional[str] = None
+    use_thread_safe: bool = False
+
+    # 网络服务配置（环境变量 MCP_HOST、MCP_PORT）
+    mcp_host: str = "0.0.0.0"
+    mcp_port: int = 8000
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """获取全局共享的配置实例（只解析一次环境变量与.env）"""
+    return Settings()
 
 
 # 全局配置实例
-settings = Settings() 
\ No newline at end of file
+settings = get_settings()
@@ -3,39 +3,129 @@ SQLite数据库连接管理模块
 """
 import sqlite3
 import logging
+import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator, Optional
+from functools import lru_cache
+from typing import Dict, Generator, Iterator, List, Optional
 from pathlib import Path
-from queue import Queue, Empty
+from collections import deque
 import time
 
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 仅对当前连接生效的参数脚本：一次executescript完成全部设置，避免逐条execute的往返开销
+# 外键约束、30秒忙等待，以及WAL下安全的性能参数
+# （提交时不再fsync、64MB缓存、临时表放内存、启用内存映射读取）
+_CONNECTION_PRAGMA_SCRIPT = """
+PRAGMA foreign_keys = ON;
+PRAGMA busy_timeout = 30000;
+PRAGMA synchronous = NORMAL;
+PRAGMA cache_size = -64000;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+"""
+
+# 常驻连接的完整参数脚本：WAL日志模式写入数据库文件、持久生效，连接建立时设置一次即可
+_PRAGMA_SCRIPT = "PRAGMA journal_mode = WAL;" + _CONNECTION_PRAGMA_SCRIPT
+
+# 每个连接缓存的预编译语句数量（sqlite3默认128）
+_STATEMENT_CACHE_SIZE = 512
+
+
+def _wrap_in_transaction(script: str) -> str:
+    """将多语句SQL脚本包裹在单个事务中，供executescript一次性执行"""
+    # BEGIN IMMEDIATE在开始时即取得写锁，避免DEFERRED事务中途升级写锁时因并发读者返回SQLITE_BUSY；
+    # 脚本末尾语句可能缺少分号，补一个空语句避免与COMMIT粘连
+    return f"BEGIN IMMEDIATE;\n{script}\n;\nCOMMIT;"
+
+
+def _quote_identifier(name: str) -> str:
+    """将标识符加双引号转义，用于拼接表名等无法参数化的位置"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _fetch_dicts(conn: sqlite3.Connection, query: str, params: tuple,
+                 max_rows: Optional[int] = None) -> List[dict]:
+    """执行查询并以dict列表返回结果（列名只取一次，行直接由元组构造；指定max_rows时最多取这么多行）"""
+    cursor = conn.cursor()
+    # 游标级覆盖row_factory，直接取元组，避免先构造sqlite3.Row再逐行转dict
+    cursor.row_factory = None
+    cursor.execute(query, params)
+    if cursor.description is None:
+        return []
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _fetch_tuples(conn: sqlite3.Connection, query: str, params: tuple,
+                  max_rows: Optional[int] = None) -> List[tuple]:
+    """执行查询并以元组列表返回结果（不构造dict，适合按位置取列的单列/少列查询）"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(query, params)
+    return cursor.fetchmany(max_rows) if max_rows else cursor.fetchall()
+
+
+def _check_mmap_enabled(conn: sqlite3.Connection) -> None:
+    """确认mmap_size设置已生效（部分SQLite构建禁用了内存映射I/O，设置会被静默忽略）"""
+    mmap_size = conn.execute("PRAGMA mmap_size").fetchone()[0]
+    if mmap_size:
+        logger.info(f"内存映射I/O已启用: {mmap_size} 字节")
+    else:
+        logger.warning("当前SQLite构建未启用内存映射I/O，读取将回退到常规read()调用")
+
 
 class ThreadSafeDatabaseManager:
     """线程安全的数据库管理器"""
     
-    def __init__(self, db_path: Optional[str] = None, max_connections: int = 10):
+    def __init__(self, db_path: Optional[str] = None, max_connections: int = 10,
+                 checkpoint_interval: float = 5.0):
         """
         初始化数据库管理器
         
         Args:
             db_path: 数据库文件路径，如果为None则使用配置中的路径
             max_connections: 最大连接数
+            checkpoint_interval: 后台WAL检查点间隔（秒）
         """
         self.db_path = db_path or settings.database_path
         self.max_connections = max_connections
-        self._connection_pool = Queue(maxsize=max_connections)
-        self._lock = threading.RLock()  # 可重入锁
+        self.checkpoint_interval = checkpoint_interval
+        # 读写分离：多个只读连接组成读池，单个读写连接专供写操作
+        # 池操作只有取/还两种，用deque+单把锁+信号量代替Queue，减少每次操作的锁开销
+        self._pool_size = max(1, max_connections - 1)
+        self._pool_deque: deque = deque(maxlen=self._pool_size)
+        self._pool_lock = threading.Lock()
+        self._pool_sem = threading.Semaphore(0)  # 计数等于池中空闲连接数
+        # 线程本地只读连接：execute_query等快捷查询在稳态下不经过连接池，无需任何锁操作
+        self._tls = threading.local()
+        self._thread_conns: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._write_conn: Optional[sqlite3.Connection] = None
         self._write_lock = threading.Lock()  # 写操作专用锁
+        # 命名语句: 名称 -> SQL文本（始终以同一文本执行，命中连接的预编译语句缓存）
+        self._prepared: Dict[str, str] = {}
         self._ensure_data_directory()
+        # 数据库文件与初始化标记都存在时，说明此前已完成初始化与完整性检查，直接跳过
+        already_initialized = self._sentinel_path.exists() and Path(self.db_path).exists()
         self._init_database()
-        self._run_init_script()
+        if already_initialized:
+            logger.info("检测到初始化标记，跳过初始化脚本与完整性检查")
+        else:
+            self._run_init_script()
         self._init_connection_pool()
-        self._check_data_integrity()
+        # 只有检查通过或修复成功时才写入标记，修复失败时下次启动仍会重新检查
+        if not already_initialized and self._check_data_integrity():
+            self._mark_initialized()
+        self._checkpoint_stop = threading.Event()
+        self._checkpoint_thread = threading.Thread(
+            target=self._checkpoint_loop, name="sqlite-checkpoint", daemon=True
+        )
+        self._checkpoint_thread.start()
     
     def _ensure_data_directory(self) -> None:
         """确保数据目录存在"""
@@ -43,60 +133,110 @@ class ThreadSafeDatabaseManager:
         db_file.parent.mkdir(parents=True, exist_ok=True)
         logger.info(f"数据库路径: {self.db_path}")
     
+    @property
+    def _sentinel_path(self) -> Path:
+        """初始化完成标记文件路径（与数据库文件同目录）"""
+        db_file = Path(self.db_path)
+        return db_file.with_name(f"{db_file.name}.initialized")
+    
+    def _mark_initialized(self) -> None:
+        """写入初始化完成标记，后续进程启动时跳过初始化脚本与完整性检查"""
+        try:
+            self._sentinel_path.touch()
+        except OSError as e:
+            logger.warning(f"写入初始化标记失败: {e}")
+    
     def _init_database(self) -> None:
-        """初始化数据库连接"""
+        """初始化数据库连接（创建专用写连接）"""
         try:
-            with self.get_connection() as conn:
-                # 启用外键约束
-                conn.execute("PRAGMA foreign_keys = ON")
-                # 设置WAL模式以提高并发性能
-                conn.execute("PRAGMA journal_mode = WAL")
-                # 设置超时时间
-                conn.execute("PRAGMA busy_timeout = 30000")  # 30秒超时
-                # 设置缓存大小
-                conn.execute("PRAGMA cache_size = -64000")  # 64MB缓存
-                logger.info("数据库初始化完成")
+            # 写连接常驻且工作在自动提交模式，事务边界由BEGIN IMMEDIATE/COMMIT显式控制
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.executescript(_PRAGMA_SCRIPT)
+            # 关闭自动检查点，避免写事务提交时被检查点阻塞，改由后台线程执行
+            conn.execute("PRAGMA wal_autocheckpoint = 0")
+            _check_mmap_enabled(conn)
+            self._write_conn = conn
+            logger.info("数据库初始化完成")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
+    def _new_read_connection(self) -> sqlite3.Connection:
+        """创建一个只读连接并应用连接参数"""
+        # 以只读模式打开；连接由池在线程间流转，需关闭同线程检查；
+        # 读连接使用自动提交模式，并放大语句缓存使热点查询保持编译状态
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_PRAGMA_SCRIPT)
+        # 禁止在读连接上执行写操作，尽早暴露误用
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+    
     def _init_connection_pool(self) -> None:
-        """初始化连接池"""
-        for _ in range(self.max_connections):
-            try:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                # 设置连接参数
-                conn.execute("PRAGMA foreign_keys = ON")
-                conn.execute("PRAGMA journal_mode = WAL")
-                conn.execute("PRAGMA busy_timeout = 30000")
-                self._connection_pool.put(conn)
-            except Exception as e:
-                logger.error(f"创建连接池连接失败: {e}")
-                raise
+        """初始化只读连接池（并行打开各连接）"""
+        pool_size = self._pool_size
+        try:
+            with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                connections = list(executor.map(lambda _: self._new_read_connection(), range(pool_size)))
+        except Exception as e:
+            logger.error(f"创建连接池连接失败: {e}")
+            raise
+        for conn in connections:
+            self._return_connection_to_pool(conn)
     
-    def _get_connection_from_pool(self) -> sqlite3.Connection:
-        """从连接池获取连接"""
+    def _acquire(self) -> sqlite3.Connection:
+        """获取当前线程专属的只读连接（首次使用时创建）"""
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._new_read_connection()
+            with self._pool_lock:
+                # 顺带关闭已退出线程遗留的连接，避免线程频繁创建销毁时连接无限增长
+                for thread in [t for t in self._thread_conns if not t.is_alive()]:
+                    self._thread_conns.pop(thread).close()
+                self._thread_conns[threading.current_thread()] = conn
+            self._tls.conn = conn
+        return conn
+    
+    def _checkpoint_loop(self) -> None:
+        """后台WAL检查点线程：定期执行PASSIVE检查点，不阻塞读写"""
+        # 使用独立连接，无需占用写锁；PASSIVE模式不会等待读者或写者
+        conn = sqlite3.connect(self.db_path)
         try:
-            # 设置超时时间，避免无限等待
-            conn = self._connection_pool.get(timeout=5)
-            return conn
-        except Empty:
+            while not self._checkpoint_stop.wait(self.checkpoint_interval):
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                except sqlite3.Error as e:
+                    logger.warning(f"WAL检查点执行失败: {e}")
+        finally:
+            conn.close()
+    
+    def _get_connection_from_pool(self) -> sqlite3.Connection:
+        """从只读连接池获取连接"""
+        # 设置超时时间，避免无限等待
+        if not self._pool_sem.acquire(timeout=5):
             raise Exception("连接池已满，无法获取连接")
+        with self._pool_lock:
+            return self._pool_deque.popleft()
     
     def _return_connection_to_pool(self, conn: sqlite3.Connection) -> None:
-        """将连接返回连接池"""
-        try:
-            # 重置连接状态
-            conn.rollback()
-            self._connection_pool.put(conn, timeout=1)
-        except Exception as e:
-            logger.error(f"返回连接到池失败: {e}")
-            # 如果返回失败，关闭连接
-            try:
-                conn.close()
-            except:
-                pass
+        """将连接返回只读连接池"""
+        # 读连接为自动提交模式且只读，不会残留事务，无需rollback重置状态；
+        # 池容量等于连接总数，归还时不会满
+        with self._pool_lock:
+            self._pool_deque.append(conn)
+        self._pool_sem.release()
     
     def _run_init_script(self) -> None:
         """运行初始化脚本"""
@@ -114,47 +254,70 @@ class ThreadSafeDatabaseManager:
             with open(init_script_path, 'r', encoding='utf-8') as f:
                 init_sql = f.read()
             
-            # 分割SQL语句并执行
-            statements = [stmt.strip() for stmt in init_sql.split(';') if stmt.strip()]
-            for stmt in statements:
-                if stmt:
-                    self.execute_update(stmt)
+            self.execute_script(init_sql)
             
             logger.info("初始化脚本执行完成")
         except Exception as e:
             logger.error(f"初始化脚本执行失败: {e}")
             raise
     
-    def _check_data_integrity(self) -> None:
-        """检查数据完整性"""
+    def _check_data_integrity(self) -> bool:
+        """
+        检查数据完整性（必要表或基础数据缺失时尝试修复）
+        
+        Returns:
+            bool: 检查通过或修复成功
+        """
+        # 一次查询同时取得必要表清单与基础数据量；基础表缺失时查询本身会失败
+        integrity_query = """
+            SELECT
+                (SELECT COUNT(*) FROM restaurants) AS restaurant_count,
+                (SELECT COUNT(*) FROM table_types) AS table_type_count,
+                (SELECT GROUP_CONCAT(name) FROM sqlite_master
+                 WHERE type='table' AND name IN ('restaurants', 'table_types', 'time_slots', 'reservations')) AS tables
+        """
         try:
-            # 检查必要的表是否存在
-            tables_query = """
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name IN ('restaurants', 'table_types', 'time_slots', 'reservations')
-            """
-            tables = self.execute_query(tables_query)
-            table_names = [row['name'] for row in tables]
-            
-            if len(table_names) < 4:
-                logger.warning(f"缺少必要的表: {table_names}")
-                self._repair_database()
-                return
-            
-            # 检查基础数据
-            restaurant_count = self.execute_query("SELECT COUNT(*) as count FROM restaurants")[0]['count']
-            table_type_count = self.execute_query("SELECT COUNT(*) as count FROM table_types")[0]['count']
-            
-            if restaurant_count == 0 or table_type_count == 0:
-                logger.warning("基础数据缺失，尝试修复")
-                self._repair_database()
-                
+            result = self.execute_query(integrity_query)[0]
+        except sqlite3.OperationalError as e:
+            logger.warning(f"缺少必要的表: {e}")
+            return self._repair_database()
         except Exception as e:
             logger.error(f"数据完整性检查失败: {e}")
-            self._repair_database()
+            return self._repair_database()
+        
+        table_names = result['tables'].split(',') if result['tables'] else []
+        if len(table_names) < 4:
+            logger.warning(f"缺少必要的表: {table_names}")
+            return self._repair_database()
+        
+        # 检查基础数据
+        if result['restaurant_count'] == 0 or result['table_type_count'] == 0:
+            logger.warning("基础数据缺失，尝试修复")
+            return self._repair_database()
+        return True
+    
+    def verify(self) -> bool:
+        """
+        按需校验数据库：先执行轻量的PRAGMA quick_check，再检查必要表与基础数据（缺失时自动修复）
+        
+        Returns:
+            bool: quick_check是否通过
+        """
+        with self.get_connection() as conn:
+            result = conn.execute("PRAGMA quick_check(1)").fetchone()[0]
+        if result != "ok":
+            logger.error(f"数据库快速校验失败: {result}")
+            return False
+        self._check_data_integrity()
+        return True
     
-    def _repair_database(self) -> None:
-        """修复数据库"""
+    def _repair_database(self) -> bool:
+        """
+        修复数据库
+        
+        Returns:
+            bool: 修复脚本是否执行成功
+        """
         try:
             logger.info("开始修复数据库...")
             
@@ -164,24 +327,23 @@ class ThreadSafeDatabaseManager:
                 with open(restaurant_init_path, 'r', encoding='utf-8') as f:
                     init_sql = f.read()
                 
-                statements = [stmt.strip() for stmt in init_sql.split(';') if stmt.strip()]
-                for stmt in statements:
-                    if stmt:
-                        self.execute_update(stmt)
+                self.execute_script(init_sql)
                 
                 logger.info("餐厅系统数据修复完成")
-            else:
-                logger.error("餐厅系统初始化脚本不存在")
+                return True
+            logger.error("餐厅系统初始化脚本不存在")
+            return False
                 
         except Exception as e:
             logger.error(f"数据库修复失败: {e}")
+            return False
     
     def check_database_status(self) -> dict:
         """检查数据库状态"""
         try:
             status = {
                 "database_path": self.db_path,
-                "connection_pool_size": self._connection_pool.qsize(),
+                "connection_pool_size": len(self._pool_deque),
                 "max_connections": self.max_connections,
                 "tables": {},
                 "data_counts": {}
@@ -189,16 +351,17 @@ class ThreadSafeDatabaseManager:
             
             # 检查表
             tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-            tables = self.execute_query(tables_query)
+            table_names = [row[0] for row in self.execute_query_rows(tables_query)]
             
-            for table in tables:
-                table_name = table['name']
-                status["tables"][table_name] = "exists"
-                
-                # 检查数据量
-                count_query = f"SELECT COUNT(*) as count FROM {table_name}"
-                count_result = self.execute_query(count_query)
-                status["data_counts"][table_name] = count_result[0]['count']
+            # 检查数据量：所有表的COUNT合并为一条UNION ALL查询，一次往返取回
+            if table_names:
+                count_query = " UNION ALL ".join(
+                    f"SELECT ? AS name, COUNT(*) AS count FROM {_quote_identifier(name)}"
+                    for name in table_names
+                )
+                for name, count in self.execute_query_rows(count_query, tuple(table_names)):
+                    status["tables"][name] = "exists"
+                    status["data_counts"][name] = count
             
             return status
             
@@ -211,51 +374,44 @@ class ThreadSafeDatabaseManager:
         try:
             logger.info("开始初始化时段库存数据...")
             
-            # 检查基础数据
-            restaurant_count = self.execute_query("SELECT COUNT(*) as count FROM restaurants")[0]['count']
-            table_type_count = self.execute_query("SELECT COUNT(*) as count FROM table_types")[0]['count']
-            
-            if restaurant_count == 0 or table_type_count == 0:
-                logger.error("基础数据缺失，无法初始化时段库存")
-                return False
-            
-            # 使用事务初始化时段库存
-            operations = [
-                ("DELETE FROM time_slots WHERE slot_start >= datetime('now', 'start of day')", ()),
-                ("""
-                INSERT INTO time_slots (restaurant_id, table_type_id, slot_start, slot_end, available, total)
-                SELECT 
-                    r.id,
-                    tt.id,
-                    datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours') as slot_start,
-                    datetime('now', '+' || (days.day) || ' days', 'start of day', '+14 hours') as slot_end,
-                    tt.quantity as available,
-                    tt.quantity as total
-                FROM restaurants r
-                JOIN table_types tt ON r.id = tt.restaurant_id
-                CROSS JOIN (
-                    SELECT 0 as day UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 
-                    UNION SELECT 4 UNION SELECT 5 UNION SELECT 6
-                ) days
-                WHERE r.name IN ('广式早茶', '川菜馆', '日料店', '西餐厅')
-                AND NOT EXISTS (
-                    SELECT 1 FROM time_slots ts 
-                    WHERE ts.restaurant_id = r.id 
-                    AND ts.table_type_id = tt.id 
-                    AND ts.slot_start = datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours')
-                )
-                """, ())
-            ]
-            
-            success = self.execute_transaction(operations)
+            # 检查基础数据与重建时段库存在同一个写事务中完成：一次加锁、一次提交
+            with self._write_transaction() as conn:
+                restaurant_count, table_type_count = conn.execute(
+                    "SELECT (SELECT COUNT(*) FROM restaurants), (SELECT COUNT(*) FROM table_types)"
+                ).fetchone()
+                
+                if restaurant_count == 0 or table_type_count == 0:
+                    logger.error("基础数据缺失，无法初始化时段库存")
+                    return False
+                
+                conn.execute("DELETE FROM time_slots WHERE slot_start >= datetime('now', 'start of day')")
+                conn.execute("""
+                    INSERT INTO time_slots (restaurant_id, table_type_id, slot_start, slot_end, available, total)
+                    SELECT 
+                        r.id,
+                        tt.id,
+                        datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours') as slot_start,
+                        datetime('now', '+' || (days.day) || ' days', 'start of day', '+14 hours') as slot_end,
+                        tt.quantity as available,
+                        tt.quantity as total
+                    FROM restaurants r
+                    JOIN table_types tt ON r.id = tt.restaurant_id
+                    CROSS JOIN (
+                        SELECT 0 as day UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 
+                        UNION SELECT 4 UNION SELECT 5 UNION SELECT 6
+                    ) days
+                    WHERE r.name IN ('广式早茶', '川菜馆', '日料店', '西餐厅')
+                    AND NOT EXISTS (
+                        SELECT 1 FROM time_slots ts 
+                        WHERE ts.restaurant_id = r.id 
+                        AND ts.table_type_id = tt.id 
+                        AND ts.slot_start = datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours')
+                    )
+                """)
+                time_slots_count = conn.execute("SELECT COUNT(*) FROM time_slots").fetchone()[0]
             
-            if success:
-                time_slots_count = self.execute_query("SELECT COUNT(*) as count FROM time_slots")[0]['count']
-                logger.info(f"时段库存初始化完成，共生成 {time_slots_count} 条记录")
-                return True
-            else:
-                logger.error("时段库存初始化失败")
-                return False
+            logger.info(f"时段库存初始化完成，共生成 {time_slots_count} 条记录")
+            return True
                 
         except Exception as e:
             logger.error(f"时段库存初始化失败: {e}")
@@ -264,43 +420,136 @@ class ThreadSafeDatabaseManager:
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """
-        获取数据库连接的上下文管理器（线程安全）
+        获取只读数据库连接的上下文管理器（线程安全）
         
         Yields:
             sqlite3.Connection: 数据库连接对象
         """
         conn = None
         try:
-            with self._lock:
-                conn = self._get_connection_from_pool()
+            conn = self._get_connection_from_pool()
             yield conn
         except Exception as e:
             logger.error(f"数据库连接错误: {e}")
             if conn:
                 try:
                     conn.rollback()
-                except:
+                except sqlite3.Error:
                     pass
             raise
         finally:
             if conn:
                 self._return_connection_to_pool(conn)
     
-    def execute_query(self, query: str, params: tuple = ()) -> list:
+    @contextmanager
+    def _write_connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        获取专用写连接的上下文管理器（持有写锁，SQLite同一时刻只允许一个写者）
+        
+        Yields:
+            sqlite3.Connection: 读写连接对象
+        """
+        with self._write_lock:
+            try:
+                yield self._write_conn
+            except Exception as e:
+                logger.error(f"数据库写操作错误: {e}")
+                self._write_conn.rollback()
+                raise
+    
+    @contextmanager
+    def _write_transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        在专用写连接上开启写事务的上下文管理器
+        
+        BEGIN IMMEDIATE在事务开始时即取得写锁，正常退出时COMMIT，异常时ROLLBACK。
+        
+        Yields:
+            sqlite3.Connection: 读写连接对象
+        """
+        with self._write_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+    
+    def execute_query(self, query: str, params: tuple = (), max_rows: Optional[int] = None,
+                      as_tuples: bool = False) -> list:
         """
         执行查询语句（线程安全）
         
         Args:
             query: SQL查询语句
             params: 查询参数
+            max_rows: 最多返回的行数，None表示不限制
+            as_tuples: 为True时每行返回元组而非dict
             
         Returns:
             list: 查询结果列表
         """
-        with self._lock:  # 读操作使用可重入锁
-            with self.get_connection() as conn:
-                cursor = conn.execute(query, params)
-                return [dict(row) for row in cursor.fetchall()]
+        fetch = _fetch_tuples if as_tuples else _fetch_dicts
+        # 读操作不占用写锁：WAL模式允许多个读者并发；使用线程本地连接，不经过连接池
+        return fetch(self._acquire(), query, params, max_rows)
+    
+    def prepare(self, name: str, query: str) -> None:
+        """
+        登记命名语句
+        
+        sqlite3模块不提供显式的prepare接口，但每个连接按SQL文本缓存预编译语句；
+        登记后始终以同一文本执行，线程本地连接上重复执行时不再重新解析与编译。
+        
+        Args:
+            name: 语句名称
+            query: SQL语句
+        """
+        self._prepared[name] = sys.intern(query)
+    
+    def execute_prepared(self, name: str, params: tuple = (), max_rows: Optional[int] = None,
+                         as_tuples: bool = False) -> list:
+        """
+        执行已登记的命名查询语句
+        
+        Args:
+            name: 语句名称（须先通过prepare登记）
+            params: 查询参数
+            max_rows: 最多返回的行数，None表示不限制
+            as_tuples: 为True时每行返回元组而非dict
+            
+        Returns:
+            list: 查询结果列表
+        """
+        return self.execute_query(self._prepared[name], params, max_rows, as_tuples)
+    
+    def execute_query_rows(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """
+        执行查询语句并直接返回sqlite3.Row（线程安全）
+        
+        sqlite3.Row同时支持下标和列名访问，省去逐行构造dict的开销，
+        适合不需要JSON序列化结果的调用方。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            List[sqlite3.Row]: 查询结果行列表
+        """
+        return self._acquire().execute(query, params).fetchall()
+    
+    def iter_query(self, query: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """
+        流式执行查询语句，逐行产出结果（线程安全）
+        
+        迭代期间会一直占用一个池连接，调用方应尽快消费完毕或关闭迭代器。
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Yields:
+            sqlite3.Row: 查询结果行
+        """
+        with self.get_connection() as conn:
+            yield from conn.execute(query, params)
     
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """
@@ -313,11 +562,9 @@ class ThreadSafeDatabaseManager:
         Returns:
             int: 受影响的行数
         """
-        with self._write_lock:  # 写操作使用专用锁
-            with self.get_connection() as conn:
-                cursor = conn.execute(query, params)
-                conn.commit()
-                return cursor.rowcount
+        with self._write_transaction() as conn:
+            cursor = conn.execute(query, params)
+        return cursor.rowcount
     
     def execute_many(self, query: str, params_list: list) -> int:
         """
@@ -330,11 +577,9 @@ class ThreadSafeDatabaseManager:
         Returns:
             int: 受影响的行数
         """
-        with self._write_lock:  # 批量操作使用写锁
-            with self.get_connection() as conn:
-                cursor = conn.executemany(query, params_list)
-                conn.commit()
-                return cursor.rowcount
+        with self._write_transaction() as conn:
+            cursor = conn.executemany(query, params_list)
+        return cursor.rowcount
     
     def execute_transaction(self, operations: list) -> bool:
         """
@@ -346,26 +591,41 @@ class ThreadSafeDatabaseManager:
         Returns:
             bool: 事务是否成功
         """
-        with self._write_lock:  # 事务使用写锁
-            with self.get_connection() as conn:
-                try:
-                    for query, params in operations:
-                        conn.execute(query, params)
-                    conn.commit()
-                    return True
-                except Exception as e:
-                    logger.error(f"事务执行失败: {e}")
-                    conn.rollback()
-                    return False
+        try:
+            with self._write_transaction() as conn:
+                for query, params in operations:
+                    conn.execute(query, params)
+            return True
+        except Exception as e:
+            logger.error(f"事务执行失败: {e}")
+            return False
+    
+    def execute_script(self, script: str) -> None:
+        """
+        在单个事务中执行多语句SQL脚本（线程安全）
+        
+        语句切分由SQLite完成，可正确处理字符串字面量、触发器体中的分号。
+        
+        Args:
+            script: SQL脚本内容
+        """
+        with self._write_connection() as conn:
+            conn.executescript(_wrap_in_transaction(script))
     
     def close(self) -> None:
         """关闭所有连接"""
-        while not self._connection_pool.empty():
-            try:
-                conn = self._connection_pool.get_nowait()
+        self._checkpoint_stop.set()
+        self._checkpoint_thread.join()
+        with self._pool_lock:
+            while self._pool_deque:
+                self._pool_deque.popleft().close()
+            for conn in self._thread_conns.values():
                 conn.close()
-            except Empty:
-                break
+            self._thread_conns.clear()
+        with self._write_lock:
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
 
 
 class DatabaseManager:
@@ -379,6 +639,8 @@ class DatabaseManager:
             db_path: 数据库文件路径，如果为None则使用配置中的路径
         """
         self.db_path = db_path or settings.database_path
+        # 命名语句: 名称 -> SQL文本
+        self._prepared: Dict[str, str] = {}
         self._ensure_data_directory()
         self._init_database()
         self._run_init_script()
@@ -392,11 +654,10 @@ class DatabaseManager:
     def _init_database(self) -> None:
         """初始化数据库连接"""
         try:
+            # WAL模式持久保存在数据库文件中，只需设置一次；其余连接参数由get_connection设置
             with self.get_connection() as conn:
-                # 启用外键约束
-                conn.execute("PRAGMA foreign_keys = ON")
-                # 设置WAL模式以提高并发性能
                 conn.execute("PRAGMA journal_mode = WAL")
+                _check_mmap_enabled(conn)
                 logger.info("数据库初始化完成")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
@@ -418,11 +679,7 @@ class DatabaseManager:
             with open(init_script_path, 'r', encoding='utf-8') as f:
                 init_sql = f.read()
             
-            # 分割SQL语句并执行
-            statements = [stmt.strip() for stmt in init_sql.split(';') if stmt.strip()]
-            for stmt in statements:
-                if stmt:
-                    self.execute_update(stmt)
+            self.execute_script(init_sql)
             
             logger.info("初始化脚本执行完成")
         except Exception as e:
@@ -441,6 +698,8 @@ class DatabaseManager:
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
+            # 外键、synchronous等参数仅对当前连接生效，每个新连接都需设置
+            conn.executescript(_CONNECTION_PRAGMA_SCRIPT)
             yield conn
         except Exception as e:
             logger.error(f"数据库连接错误: {e}")
@@ -451,20 +710,79 @@ class DatabaseManager:
             if conn:
                 conn.close()
     
-    def execute_query(self, query: str, params: tuple = ()) -> list:
+    def execute_query(self, query: str, params: tuple = (), max_rows: Optional[int] = None,
+                      as_tuples: bool = False) -> list:
         """
         执行查询语句
         
         Args:
             query: SQL查询语句
             params: 查询参数
+            max_rows: 最多返回的行数，None表示不限制
+            as_tuples: 为True时每行返回元组而非dict
             
         Returns:
             list: 查询结果列表
         """
+        fetch = _fetch_tuples if as_tuples else _fetch_dicts
         with self.get_connection() as conn:
-            cursor = conn.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch(conn, query, params, max_rows)
+    
+    def prepare(self, name: str, query: str) -> None:
+        """
+        登记命名语句
+        
+        与ThreadSafeDatabaseManager接口一致；本管理器每次调用都新建连接，语句缓存无法跨调用复用。
+        
+        Args:
+            name: 语句名称
+            query: SQL语句
+        """
+        self._prepared[name] = sys.intern(query)
+    
+    def execute_prepared(self, name: str, params: tuple = (), max_rows: Optional[int] = None,
+                         as_tuples: bool = False) -> list:
+        """
+        执行已登记的命名查询语句
+        
+        Args:
+            name: 语句名称（须先通过prepare登记）
+            params: 查询参数
+            max_rows: 最多返回的行数，None表示不限制
+            as_tuples: 为True时每行返回元组而非dict
+            
+        Returns:
+            list: 查询结果列表
+        """
+        return self.execute_query(self._prepared[name], params, max_rows, as_tuples)
+    
+    def execute_query_rows(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """
+        执行查询语句并直接返回sqlite3.Row（不逐行构造dict）
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Returns:
+            List[sqlite3.Row]: 查询结果行列表
+        """
+        with self.get_connection() as conn:
+            return conn.execute(query, params).fetchall()
+    
+    def iter_query(self, query: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """
+        流式执行查询语句，逐行产出结果（迭代结束后关闭连接）
+        
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            
+        Yields:
+            sqlite3.Row: 查询结果行
+        """
+        with self.get_connection() as conn:
+            yield from conn.execute(query, params)
     
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """
@@ -497,17 +815,64 @@ class DatabaseManager:
             cursor = conn.executemany(query, params_list)
             conn.commit()
             return cursor.rowcount
+    
+    def execute_transaction(self, operations: list) -> bool:
+        """
+        执行事务
+        
+        使用BEGIN IMMEDIATE显式开启事务，开始时即取得写锁，
+        避免隐式DEFERRED事务在首条写语句处升级锁失败导致整个事务回滚。
+        
+        Args:
+            operations: 操作列表，每个元素为 (query, params) 元组
+            
+        Returns:
+            bool: 事务是否成功
+        """
+        try:
+            with self.get_connection() as conn:
+                # 切换为自动提交模式，事务边界完全由显式语句控制
+                conn.isolation_level = None
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for query, params in operations:
+                        conn.execute(query, params)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            return True
+        except Exception as e:
+            logger.error(f"事务执行失败: {e}")
+            return False
+    
+    def execute_script(self, script: str) -> None:
+        """
+        在单个事务中执行多语句SQL脚本
+        
+        Args:
+            script: SQL脚本内容
+        """
+        with self.get_connection() as conn:
+            conn.executescript(_wrap_in_transaction(script))
+
+
+@lru_cache(maxsize=1)
+def get_db_manager() -> DatabaseManager:
+    """获取全局数据库管理器实例（延迟初始化，进程内唯一）"""
+    return DatabaseManager()
 
 
-# 全局数据库管理器实例
-db_manager = DatabaseManager()
+@lru_cache(maxsize=1)
+def get_thread_safe_db_manager() -> ThreadSafeDatabaseManager:
+    """获取线程安全的数据库管理器实例（延迟初始化，进程内唯一）"""
+    return ThreadSafeDatabaseManager()
 
-# 线程安全的数据库管理器实例（延迟初始化）
-thread_safe_db_manager = None
 
-def get_thread_safe_db_manager():
-    """获取线程安全的数据库管理器实例（延迟初始化）"""
-    global thread_safe_db_manager
-    if thread_safe_db_manager is None:
-        thread_safe_db_manager = ThreadSafeDatabaseManager()
-    return thread_safe_db_manager 
\ No newline at end of file
+def __getattr__(name: str):
+    """兼容 `from database.connection import db_manager` 的旧用法：首次访问时才创建实例"""
+    if name == "db_manager":
+        return get_db_manager()
+    if name == "thread_safe_db_manager":
+        return get_thread_safe_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,39 +4,183 @@
 import sqlite3
 import logging
 import threading
-import fcntl
 import os
 import time
 import uuid
+import re
+from collections import OrderedDict
+from concurrent.futures import Future
 from contextlib import contextmanager
+from functools import lru_cache
+from itertools import groupby
 from typing import Generator, Optional, Dict, Any, List
 from pathlib import Path
+from queue import Queue, SimpleQueue, Empty
 import json
-import hashlib
+
+import msgpack
 
 from config.settings import settings
+from database.connection import _fetch_dicts
 
 logger = logging.getLogger(__name__)
 
+# 连接参数脚本：只在建池时对每个连接执行一次，不再随每次取连接重复设置
+# 外键约束、WAL日志、60秒忙等待、128MB缓存、NORMAL同步、临时表放内存
+_PRAGMA_SCRIPT = """
+PRAGMA foreign_keys = ON;
+PRAGMA journal_mode = WAL;
+PRAGMA busy_timeout = 60000;
+PRAGMA cache_size = -128000;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+"""
+
+# 每个连接缓存的预编译语句数量（sqlite3默认128）；连接常驻，缓存可长期命中
+_STATEMENT_CACHE_SIZE = 512
+
+
+def _query_hash(query: str, params: tuple) -> int:
+    """计算查询标识哈希（仅用于缓存身份识别，使用内置hash即可，无需加密哈希）"""
+    try:
+        return hash((query, params))
+    except TypeError:
+        # 参数中含不可哈希对象（如list）时退化为按文本表示计算
+        return hash((query, repr(params)))
+
+
+# 写语句（UPDATE/INSERT INTO/DELETE FROM）的目标表名
+_WRITE_TABLE_RE = re.compile(
+    r'^\s*(?:update\s+([^\s(]+)|insert\s+into\s+([^\s(]+)|delete\s+from\s+([^\s(]+))', re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
+def _match_write_table(query: str) -> Optional[str]:
+    """一次正则匹配提取写语句的目标表名（小写），按查询文本缓存"""
+    match = _WRITE_TABLE_RE.match(query)
+    if not match:
+        return None
+    return next(name for name in match.groups() if name).lower()
+
+
+# 可以合并为executemany批量执行的数据修改语句
+_DML_RE = re.compile(r'^\s*(?:insert|update|delete|replace)\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def _version_sql(table_name: str, version_column: str) -> str:
+    """按 (表名, 版本列) 缓存版本查询语句，保证同一语句始终是同一个字符串，命中预编译语句缓存"""
+    return f"SELECT {version_column} FROM {table_name} WHERE id = ?"
+
+
+def _discard_from_index(index: Dict[Any, set], index_key: Any, cache_key: str) -> None:
+    """从失效索引中注销缓存键，集合为空时删除索引项，避免索引随缓存过的表/记录无限增长"""
+    keys = index.get(index_key)
+    if keys is None:
+        return
+    keys.discard(cache_key)
+    if not keys:
+        del index[index_key]
+
+
+# 一致性缓存容量上限与有效期（秒）
+_CACHE_MAX_ENTRIES = 4096
+_CACHE_TTL = 60
+
+# 查询语句中FROM/JOIN之后的表名，用于登记缓存项依赖的表
+_QUERY_TABLES_RE = re.compile(r'\b(?:from|join)\s+["`\[]?(\w+)', re.IGNORECASE)
+
+
+def _begin_immediate(conn: sqlite3.Connection) -> None:
+    """开启写事务并立即取得写锁；跨进程写冲突由SQLite的忙等待处理器在busy_timeout内退避重试"""
+    conn.execute("BEGIN IMMEDIATE")
+
+
+# 事务日志库：独立的SQLite文件，WAL模式下追加写入不阻塞历史查询
+_TXLOG_SCRIPT = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA busy_timeout = 60000;
+CREATE TABLE IF NOT EXISTS tx (
+    ts REAL NOT NULL,
+    agent TEXT,
+    session TEXT,
+    op TEXT,
+    query TEXT,
+    params BLOB,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_tx_ts ON tx(ts);
+"""
+
+# 后台写入线程每批最多合并的记录数
+_TXLOG_BATCH_SIZE = 256
+
+# 等待后台写入线程刷新日志的最长秒数，超时后不再等待（写入线程异常退出时不至于永久阻塞）
+_TXLOG_FLUSH_TIMEOUT = 10.0
+
+_TXLOG_INSERT = "INSERT INTO tx (ts, agent, session, op, query, params, result) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_TXLOG_COLUMNS = "ts, agent, session, op, query, params, result"
+
+
+def _txlog_row(record: Dict[str, Any]) -> tuple:
+    """将事务记录转换为tx表的一行（参数以msgpack编码，结果以JSON文本保存）"""
+    return (
+        record["timestamp"],
+        record["agent_id"],
+        record["session_id"],
+        record["operation"],
+        record["query"],
+        msgpack.packb(record["params"], default=str),
+        json.dumps(record["result"], default=str),
+    )
+
+
+def _txlog_record(row: tuple) -> Dict[str, Any]:
+    """将tx表的一行还原为事务记录"""
+    ts, agent, session, op, query, params, result = row
+    return {
+        "timestamp": ts,
+        "agent_id": agent,
+        "session_id": session,
+        "operation": op,
+        "query": query,
+        "params": msgpack.unpackb(params) if params is not None else None,
+        "result": json.loads(result) if result is not None else None,
+    }
+
 
 class MultiAgentDatabaseManager:
     """多Agent数据库管理器 - 支持跨进程并发控制"""
     
-    def __init__(self, db_path: Optional[str] = None, agent_id: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, agent_id: Optional[str] = None,
+                 pool_size: int = 4):
         """
         初始化多Agent数据库管理器
         
         Args:
             db_path: 数据库文件路径
             agent_id: Agent唯一标识符
+            pool_size: 只读连接池大小
         """
         self.db_path = db_path or settings.database_path
         self.agent_id = agent_id or str(uuid.uuid4())
-        self._lock_file_path = f"{self.db_path}.lock"
-        self._transaction_log_path = f"{self.db_path}.transactions"
+        # 事务日志保存在独立的SQLite库中
+        self._transaction_log_path = f"{self.db_path}.txlog"
         self._session_id = str(uuid.uuid4())
-        self._local_lock = threading.RLock()
-        self._write_lock = threading.Lock()
+        # 写锁保护唯一的读写连接；可重入，持锁的写操作内部还需再次取得读写连接
+        self._write_lock = threading.RLock()
+        self.pool_size = max(1, pool_size)
+        self._rw_conn: Optional[sqlite3.Connection] = None
+        # 待合并提交的写请求：(query, params, version_column, version_value, future)
+        self._pending_writes: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._read_pool: Queue = Queue(maxsize=self.pool_size)
+        # 线程本地只读连接：普通一致性级别的查询各线程使用自己的连接，读并发不受池大小限制
+        self._tls = threading.local()
+        self._thread_conns: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._thread_conns_lock = threading.Lock()
         self._ensure_data_directory()
         self._init_database()
         self._init_transaction_log()
@@ -49,62 +193,106 @@ class MultiAgentDatabaseManager:
         logger.info(f"数据库路径: {self.db_path}")
     
     def _init_database(self) -> None:
-        """初始化数据库连接"""
+        """初始化数据库连接（一个常驻读写连接 + 只读连接池）"""
         try:
-            with self.get_connection() as conn:
-                # 启用外键约束
-                conn.execute("PRAGMA foreign_keys = ON")
-                # 设置WAL模式以提高并发性能
-                conn.execute("PRAGMA journal_mode = WAL")
-                # 设置超时时间
-                conn.execute("PRAGMA busy_timeout = 60000")  # 60秒超时
-                # 设置缓存大小
-                conn.execute("PRAGMA cache_size = -128000")  # 128MB缓存
-                # 设置同步模式
-                conn.execute("PRAGMA synchronous = NORMAL")
-                # 设置临时存储
-                conn.execute("PRAGMA temp_store = MEMORY")
-                logger.info("数据库初始化完成")
+            # 读写连接先创建，确保数据库文件存在后再以只读模式打开池连接
+            self._rw_conn = self._open_connection(readonly=False)
+            for _ in range(self.pool_size):
+                self._read_pool.put(self._open_connection(readonly=True))
+            logger.info("数据库初始化完成")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
+    def _open_connection(self, readonly: bool) -> sqlite3.Connection:
+        """打开一个连接并应用连接参数"""
+        if readonly:
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+            )
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_PRAGMA_SCRIPT)
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """获取当前线程专属的只读连接（首次使用时创建）"""
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._open_connection(readonly=True)
+            with self._thread_conns_lock:
+                # 顺带关闭已退出线程遗留的连接，避免线程频繁创建销毁时连接无限增长
+                for thread in [t for t in self._thread_conns if not t.is_alive()]:
+                    self._thread_conns.pop(thread).close()
+                self._thread_conns[threading.current_thread()] = conn
+            self._tls.conn = conn
+        return conn
+    
     def _init_transaction_log(self) -> None:
-        """初始化事务日志"""
+        """初始化事务日志库并启动后台写入线程"""
+        # 队列元素：事务记录dict；threading.Event为刷新标记（写入后置位）；None为关闭信号
+        self._log_queue: SimpleQueue = SimpleQueue()
+        self._txlog_lock = threading.Lock()
+        self._log_thread: Optional[threading.Thread] = None
         try:
-            if not os.path.exists(self._transaction_log_path):
-                with open(self._transaction_log_path, 'w') as f:
-                    json.dump({"transactions": []}, f)
+            # 此连接负责建表，之后供历史查询与清理使用；写入由后台线程的独立连接完成
+            self._txlog_conn = sqlite3.connect(self._transaction_log_path, check_same_thread=False)
+            self._txlog_conn.executescript(_TXLOG_SCRIPT)
         except Exception as e:
             logger.error(f"初始化事务日志失败: {e}")
+            return
+        self._log_thread = threading.Thread(
+            target=self._log_writer_loop, name="transaction-log-writer", daemon=True
+        )
+        self._log_thread.start()
     
-    def _get_file_lock(self, timeout: int = 30) -> bool:
-        """获取文件锁（跨进程锁）"""
+    def _log_writer_loop(self) -> None:
+        """后台事务日志写入线程：持有专用连接，每批最多合并_TXLOG_BATCH_SIZE条记录一次提交"""
+        conn = sqlite3.connect(self._transaction_log_path)
+        conn.executescript(_TXLOG_SCRIPT)
         try:
-            self._lock_file = open(self._lock_file_path, 'w')
-            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            return True
-        except (IOError, OSError):
-            logger.warning(f"Agent {self.agent_id} 无法获取文件锁，等待中...")
-            start_time = time.time()
-            while time.time() - start_time < timeout:
+            while True:
+                batch = [self._log_queue.get()]
+                while len(batch) < _TXLOG_BATCH_SIZE:
+                    try:
+                        batch.append(self._log_queue.get_nowait())
+                    except Empty:
+                        break
+                rows = []
+                for item in batch:
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        rows.append(_txlog_row(item))
+                    except Exception as e:
+                        # 无法编码的记录直接丢弃，不影响同批其他记录及等待刷新的调用方
+                        logger.error(f"事务日志记录编码失败，已丢弃: {e}")
                 try:
-                    time.sleep(0.1)
-                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                    return True
-                except (IOError, OSError):
-                    continue
-            logger.error(f"Agent {self.agent_id} 获取文件锁超时")
-            return False
+                    if rows:
+                        conn.executemany(_TXLOG_INSERT, rows)
+                        conn.commit()
+                except Exception as e:
+                    logger.error(f"写入事务日志失败: {e}")
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+                if None in batch:
+                    return
+        finally:
+            conn.close()
     
-    def _release_file_lock(self) -> None:
-        """释放文件锁"""
-        try:
-            if hasattr(self, '_lock_file'):
-                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
-                self._lock_file.close()
-        except Exception as e:
-            logger.error(f"释放文件锁失败: {e}")
+    def _flush_transaction_log(self) -> None:
+        """等待此前入队的事务记录全部写入，保证能读到自己刚记录的事务"""
+        if self._log_thread is None or not self._log_thread.is_alive():
+            return
+        marker = threading.Event()
+        self._log_queue.put(marker)
+        if not marker.wait(_TXLOG_FLUSH_TIMEOUT):
+            logger.warning(f"等待事务日志写入超时（{_TXLOG_FLUSH_TIMEOUT}秒）")
     
     def _log_transaction(self, operation: str, query: str, params: tuple, result: Any) -> None:
         """记录事务日志"""
@@ -118,44 +306,47 @@ class MultiAgentDatabaseManager:
                 "params": params,
                 "result": result
             }
-            
-            with open(self._transaction_log_path, 'r+') as f:
-                data = json.load(f)
-                data["transactions"].append(transaction)
-                f.seek(0)
-                json.dump(data, f, indent=2)
-                f.truncate()
+            # 只入队，序列化与写入都由后台线程完成
+            self._log_queue.put(transaction)
         except Exception as e:
             logger.error(f"记录事务日志失败: {e}")
     
     @contextmanager
-    def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
+    def get_connection(self, readonly: bool = False) -> Generator[sqlite3.Connection, None, None]:
         """
         获取数据库连接的上下文管理器（多Agent安全）
         
+        只读连接从连接池借出并在退出时归还；读写连接全局唯一，使用期间持有写锁。
+        
+        Args:
+            readonly: 是否获取只读连接
+            
         Yields:
             sqlite3.Connection: 数据库连接对象
         """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            # 设置连接参数
-            conn.execute("PRAGMA foreign_keys = ON")
-            conn.execute("PRAGMA journal_mode = WAL")
-            conn.execute("PRAGMA busy_timeout = 60000")
-            yield conn
-        except Exception as e:
-            logger.error(f"数据库连接错误: {e}")
-            if conn:
+        if readonly:
+            try:
+                conn = self._read_pool.get(timeout=30)
+            except Empty:
+                raise Exception("连接池已满，无法获取连接")
+            try:
+                yield conn
+            except Exception as e:
+                logger.error(f"数据库连接错误: {e}")
+                raise
+            finally:
+                self._read_pool.put(conn)
+        else:
+            with self._write_lock:
                 try:
-                    conn.rollback()
-                except:
-                    pass
-            raise
-        finally:
-            if conn:
-                conn.close()
+                    yield self._rw_conn
+                except Exception as e:
+                    logger.error(f"数据库连接错误: {e}")
+                    try:
+                        self._rw_conn.rollback()
+                    except sqlite3.Error:
+                        pass
+                    raise
     
     def execute_query_with_consistency(self, query: str, params: tuple = (), 
                                      consistency_level: str = "read_committed") -> List[Dict]:
@@ -170,26 +361,19 @@ class MultiAgentDatabaseManager:
         Returns:
             list: 查询结果列表
         """
-        with self._local_lock:
-            if consistency_level == "serializable":
-                # 串行化级别：获取文件锁确保一致性
-                if not self._get_file_lock():
-                    raise Exception("无法获取数据库锁，操作失败")
+        if consistency_level == "serializable":
+            # 串行化级别：在读写连接上以BEGIN IMMEDIATE读取，期间其他写者（含其他进程）无法提交
+            with self.get_connection() as conn:
+                _begin_immediate(conn)
                 try:
-                    with self.get_connection() as conn:
-                        cursor = conn.execute(query, params)
-                        results = [dict(row) for row in cursor.fetchall()]
-                        self._log_transaction("query", query, params, len(results))
-                        return results
+                    results = _fetch_dicts(conn, query, params)
                 finally:
-                    self._release_file_lock()
-            else:
-                # 其他级别：使用本地锁
-                with self.get_connection() as conn:
-                    cursor = conn.execute(query, params)
-                    results = [dict(row) for row in cursor.fetchall()]
-                    self._log_transaction("query", query, params, len(results))
-                    return results
+                    conn.commit()
+        else:
+            # 其他级别：WAL模式下读者互不阻塞，使用线程本地只读连接，不经过连接池也不加锁
+            results = _fetch_dicts(self._acquire(), query, params)
+        self._log_transaction("query", query, params, len(results))
+        return results
     
     def execute_update_with_optimistic_lock(self, query: str, params: tuple = (), 
                                           version_column: Optional[str] = None,
@@ -206,37 +390,74 @@ class MultiAgentDatabaseManager:
         Returns:
             int: 受影响的行数
         """
-        with self._write_lock:
-            if not self._get_file_lock():
-                raise Exception("无法获取数据库锁，操作失败")
-            
-            try:
-                with self.get_connection() as conn:
-                    # 如果使用乐观锁，先检查版本
-                    if version_column and version_value is not None:
-                        # 提取表名（简化实现）
-                        table_name = self._extract_table_name(query)
-                        if table_name:
-                            check_query = f"SELECT {version_column} FROM {table_name} WHERE id = ?"
-                            cursor = conn.execute(check_query, (params[0],))
-                            current_version = cursor.fetchone()
-                            if current_version and current_version[0] != version_value:
-                                raise Exception(f"版本冲突：期望版本 {version_value}，实际版本 {current_version[0]}")
-                    
-                    cursor = conn.execute(query, params)
-                    affected_rows = cursor.rowcount
-                    conn.commit()
-                    
-                    self._log_transaction("update", query, params, affected_rows)
-                    return affected_rows
-            finally:
-                self._release_file_lock()
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending_writes.append((query, params, version_column, version_value, future))
+        # 排队等待写锁：取得写锁的线程把队列中堆积的全部写请求合并到一个事务提交（flat combining），
+        # 请求已被其他线程顺带提交的线程拿到锁后直接返回结果
+        with self.get_connection() as conn:
+            if not future.done():
+                self._commit_pending_writes(conn)
+        return future.result()
+    
+    def _commit_pending_writes(self, conn: sqlite3.Connection) -> None:
+        """在一个写事务中提交所有待处理的写请求（调用方需持有写锁）"""
+        with self._pending_lock:
+            batch, self._pending_writes = self._pending_writes, []
+        
+        outcomes = []
+        try:
+            # 进程内由写锁串行化；跨进程由SQLite自身的写锁（BEGIN IMMEDIATE + busy_timeout）保证
+            _begin_immediate(conn)
+            for query, params, version_column, version_value, future in batch:
+                # 每个请求使用独立的保存点，单个请求失败（如版本冲突）只回滚它自己
+                conn.execute("SAVEPOINT pending_write")
+                try:
+                    affected_rows = self._apply_update(conn, query, params, version_column, version_value)
+                    outcomes.append((future, affected_rows, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO pending_write")
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE pending_write")
+            conn.commit()
+        except Exception as e:
+            logger.error(f"合并写事务提交失败: {e}")
+            conn.rollback()
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        
+        for (query, params, *_), (future, affected_rows, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                self._log_transaction("update", query, params, affected_rows)
+                future.set_result(affected_rows)
+    
+    def _apply_update(self, conn: sqlite3.Connection, query: str, params: tuple,
+                      version_column: Optional[str], version_value: Optional[int]) -> int:
+        """在当前事务中执行单个更新请求（含乐观锁版本检查），返回受影响的行数"""
+        # 如果使用乐观锁，先检查版本
+        if version_column and version_value is not None:
+            # 提取表名（简化实现）
+            table_name = self._extract_table_name(query)
+            if table_name:
+                cursor = conn.execute(_version_sql(table_name, version_column), (params[0],))
+                current_version = cursor.fetchone()
+                if current_version and current_version[0] != version_value:
+                    raise Exception(f"版本冲突：期望版本 {version_value}，实际版本 {current_version[0]}")
+        
+        return conn.execute(query, params).rowcount
     
     def execute_transaction_with_isolation(self, operations: List[tuple], 
                                          isolation_level: str = "serializable") -> bool:
         """
         执行事务（支持隔离级别）
         
+        连续的相同INSERT/UPDATE/DELETE/REPLACE语句合并为一次executemany执行。
+        WAL模式且未启用共享缓存时，读者永远看不到未提交的数据，
+        isolation_level仅为兼容保留，无需再逐事务设置read_uncommitted。
+        
         Args:
             operations: 操作列表，每个元素为 (query, params) 元组
             isolation_level: 隔离级别 ("read_uncommitted", "read_committed", "serializable")
@@ -244,81 +465,81 @@ class MultiAgentDatabaseManager:
         Returns:
             bool: 事务是否成功
         """
-        with self._write_lock:
-            if not self._get_file_lock():
-                raise Exception("无法获取数据库锁，操作失败")
-            
+        with self.get_connection() as conn:
             try:
-                with self.get_connection() as conn:
-                    # 设置隔离级别
-                    if isolation_level == "serializable":
-                        conn.execute("PRAGMA read_uncommitted = 0")
-                    elif isolation_level == "read_committed":
-                        conn.execute("PRAGMA read_uncommitted = 0")
-                    else:  # read_uncommitted
-                        conn.execute("PRAGMA read_uncommitted = 1")
-                    
-                    try:
-                        for query, params in operations:
+                # 开始时即取得写锁，代替原先的跨进程文件锁
+                _begin_immediate(conn)
+                for query, group in groupby(operations, key=lambda op: op[0]):
+                    params_list = [params for _, params in group]
+                    if len(params_list) > 1 and _DML_RE.match(query):
+                        conn.executemany(query, params_list)
+                    else:
+                        # executemany只接受数据修改语句，其余语句逐条执行
+                        for params in params_list:
                             conn.execute(query, params)
-                        conn.commit()
-                        
-                        # 记录事务日志
-                        self._log_transaction("transaction", str(operations), (), True)
-                        return True
-                    except Exception as e:
-                        logger.error(f"事务执行失败: {e}")
-                        conn.rollback()
-                        self._log_transaction("transaction", str(operations), (), False)
-                        return False
-            finally:
-                self._release_file_lock()
+                conn.commit()
+                
+                # 记录事务日志
+                self._log_transaction("transaction", str(operations), (), True)
+                return True
+            except Exception as e:
+                logger.error(f"事务执行失败: {e}")
+                conn.rollback()
+                self._log_transaction("transaction", str(operations), (), False)
+                return False
     
     def _extract_table_name(self, query: str) -> Optional[str]:
         """从SQL查询中提取表名（简化实现）"""
-        query_lower = query.lower().strip()
-        if query_lower.startswith("update "):
-            parts = query_lower.split()
-            if len(parts) >= 2:
-                return parts[1]
-        elif query_lower.startswith("insert into "):
-            parts = query_lower.split()
-            if len(parts) >= 3:
-                return parts[2]
-        elif query_lower.startswith("delete from "):
-            parts = query_lower.split()
-            if len(parts) >= 3:
-                return parts[2]
-        return None
+        return _match_write_table(query)
+    
+    def _read_log_records(self, limit: int = 0) -> List[Dict]:
+        """按时间顺序读取事务日志记录（limit大于0时只取最近limit条）"""
+        with self._txlog_lock:
+            if limit > 0:
+                rows = self._txlog_conn.execute(
+                    f"SELECT {_TXLOG_COLUMNS} FROM tx ORDER BY ts DESC LIMIT ?", (limit,)
+                ).fetchall()
+                rows.reverse()
+            else:
+                rows = self._txlog_conn.execute(f"SELECT {_TXLOG_COLUMNS} FROM tx ORDER BY ts").fetchall()
+        return [_txlog_record(row) for row in rows]
     
     def get_transaction_history(self, limit: int = 100) -> List[Dict]:
         """获取事务历史"""
         try:
-            with open(self._transaction_log_path, 'r') as f:
-                data = json.load(f)
-                transactions = data.get("transactions", [])
-                return transactions[-limit:] if limit > 0 else transactions
+            self._flush_transaction_log()
+            return self._read_log_records(limit)
         except Exception as e:
             logger.error(f"获取事务历史失败: {e}")
             return []
     
+    def export_transaction_log(self, output_path: str) -> int:
+        """
+        将事务日志导出为JSON Lines文本，便于人工查看
+        
+        Args:
+            output_path: 导出文件路径
+            
+        Returns:
+            int: 导出的记录数
+        """
+        self._flush_transaction_log()
+        records = self._read_log_records()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return len(records)
+    
     def cleanup_old_transactions(self, max_age_hours: int = 24) -> int:
         """清理旧的事务日志"""
         try:
             cutoff_time = time.time() - (max_age_hours * 3600)
-            with open(self._transaction_log_path, 'r') as f:
-                data = json.load(f)
-            
-            original_count = len(data.get("transactions", []))
-            data["transactions"] = [
-                tx for tx in data.get("transactions", [])
-                if tx.get("timestamp", 0) > cutoff_time
-            ]
-            
-            with open(self._transaction_log_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._flush_transaction_log()
+            with self._txlog_lock:
+                cursor = self._txlog_conn.execute("DELETE FROM tx WHERE ts < ?", (cutoff_time,))
+                self._txlog_conn.commit()
             
-            cleaned_count = original_count - len(data["transactions"])
+            cleaned_count = cursor.rowcount
             logger.info(f"清理了 {cleaned_count} 条旧事务记录")
             return cleaned_count
         except Exception as e:
@@ -331,7 +552,6 @@ class MultiAgentDatabaseManager:
             "agent_id": self.agent_id,
             "session_id": self._session_id,
             "database_path": self.db_path,
-            "lock_file_exists": os.path.exists(self._lock_file_path),
             "transaction_log_exists": os.path.exists(self._transaction_log_path),
             "timestamp": time.time()
         }
@@ -339,7 +559,24 @@ class MultiAgentDatabaseManager:
     def close(self) -> None:
         """关闭数据库管理器"""
         try:
-            self._release_file_lock()
+            if self._log_thread is not None:
+                self._log_queue.put(None)
+                self._log_thread.join()
+                self._log_thread = None
+                self._txlog_conn.close()
+            while True:
+                try:
+                    self._read_pool.get_nowait().close()
+                except Empty:
+                    break
+            with self._thread_conns_lock:
+                for conn in self._thread_conns.values():
+                    conn.close()
+                self._thread_conns.clear()
+            with self._write_lock:
+                if self._rw_conn is not None:
+                    self._rw_conn.close()
+                    self._rw_conn = None
             logger.info(f"Agent {self.agent_id} 数据库管理器已关闭")
         except Exception as e:
             logger.error(f"关闭数据库管理器失败: {e}")
@@ -350,11 +587,16 @@ class ConsistencyManager:
     
     def __init__(self, db_manager: MultiAgentDatabaseManager):
         self.db_manager = db_manager
-        self._consistency_cache = {}
+        # LRU顺序：最近使用的缓存项在末尾，超出容量时从头部淘汰
+        self._consistency_cache: OrderedDict = OrderedDict()
+        # 失效索引：表名 -> 缓存键集合，(表名, 记录ID) -> 缓存键集合；与缓存共用_cache_lock
+        self._table_index: Dict[str, set] = {}
+        self._record_index: Dict[tuple, set] = {}
         self._cache_lock = threading.Lock()
     
     def read_with_cache_validation(self, query: str, params: tuple = (), 
-                                 cache_key: Optional[str] = None) -> List[Dict]:
+                                 cache_key: Optional[str] = None,
+                                 record_id: Optional[int] = None) -> List[Dict]:
         """
         带缓存验证的读取操作
         
@@ -362,37 +604,56 @@ class ConsistencyManager:
             query: SQL查询语句
             params: 查询参数
             cache_key: 缓存键（可选）
+            record_id: 查询针对的记录ID（可选，用于按记录精确失效）
             
         Returns:
             list: 查询结果列表
         """
         if cache_key:
             with self._cache_lock:
-                if cache_key in self._consistency_cache:
-                    cached_result = self._consistency_cache[cache_key]
-                    # 验证缓存是否仍然有效
-                    if self._validate_cache(cache_key, cached_result):
+                cached_result = self._consistency_cache.get(cache_key)
+                if cached_result is not None:
+                    if time.time() - cached_result["timestamp"] < _CACHE_TTL:
+                        self._consistency_cache.move_to_end(cache_key)
                         return cached_result["data"]
+                    # 已过期，直接移除
+                    self._discard_cache_entry(cache_key)
         
         # 执行查询
         result = self.db_manager.execute_query_with_consistency(query, params, "read_committed")
         
         # 更新缓存
         if cache_key:
+            tables = {name.lower() for name in _QUERY_TABLES_RE.findall(query)}
             with self._cache_lock:
                 self._consistency_cache[cache_key] = {
                     "data": result,
                     "timestamp": time.time(),
-                    "query_hash": hashlib.md5(f"{query}{params}".encode()).hexdigest()
+                    "query_hash": _query_hash(query, params),
+                    "tables": tables,
+                    "record_id": record_id
                 }
+                self._consistency_cache.move_to_end(cache_key)
+                # 登记缓存项依赖的表（及记录），更新时据此精确失效
+                for table in tables:
+                    self._table_index.setdefault(table, set()).add(cache_key)
+                    if record_id is not None:
+                        self._record_index.setdefault((table, record_id), set()).add(cache_key)
+                # 超出容量时淘汰最久未使用的缓存项
+                while len(self._consistency_cache) > _CACHE_MAX_ENTRIES:
+                    self._discard_cache_entry(next(iter(self._consistency_cache)))
         
         return result
     
-    def _validate_cache(self, cache_key: str, cached_result: Dict) -> bool:
-        """验证缓存是否有效"""
-        # 简单的基于时间的缓存验证
-        cache_age = time.time() - cached_result.get("timestamp", 0)
-        return cache_age < 60  # 1分钟缓存有效期
+    def _discard_cache_entry(self, cache_key: str) -> None:
+        """移除缓存项并从失效索引中注销（调用方需持有_cache_lock）"""
+        entry = self._consistency_cache.pop(cache_key, None)
+        if entry is None:
+            return
+        for table in entry["tables"]:
+            _discard_from_index(self._table_index, table, cache_key)
+            if entry["record_id"] is not None:
+                _discard_from_index(self._record_index, (table, entry["record_id"]), cache_key)
     
     def update_with_version_check(self, query: str, params: tuple, 
                                 table_name: str, record_id: int) -> bool:
@@ -410,7 +671,7 @@ class ConsistencyManager:
         """
         try:
             # 获取当前版本
-            version_query = f"SELECT version FROM {table_name} WHERE id = ?"
+            version_query = _version_sql(table_name, "version")
             current_version = self.db_manager.execute_query_with_consistency(
                 version_query, (record_id,), "read_committed"
             )
@@ -437,15 +698,31 @@ class ConsistencyManager:
     
     def _clear_related_cache(self, table_name: str, record_id: int) -> None:
         """清除相关缓存"""
+        table = table_name.lower()
         with self._cache_lock:
-            keys_to_remove = [
-                key for key in self._consistency_cache.keys()
-                if table_name in key or str(record_id) in key
-            ]
+            # 依赖该表的查询都可能受影响（如列表查询），按记录登记的键是其子集
+            keys_to_remove = self._table_index.get(table, set()) | self._record_index.get((table, record_id), set())
+            # 逐项注销，同时清理这些缓存项在其他表（多表查询）索引中的登记，清空的索引项随之删除
             for key in keys_to_remove:
-                del self._consistency_cache[key]
+                self._discard_cache_entry(key)
+
+
+@lru_cache(maxsize=1)
+def get_multi_agent_db_manager() -> MultiAgentDatabaseManager:
+    """获取全局多Agent数据库管理器实例（延迟初始化，进程内唯一）"""
+    return MultiAgentDatabaseManager()
+
+
+@lru_cache(maxsize=1)
+def get_consistency_manager() -> ConsistencyManager:
+    """获取全局一致性管理器实例（延迟初始化，进程内唯一）"""
+    return ConsistencyManager(get_multi_agent_db_manager())
 
 
-# 全局实例
-multi_agent_db_manager = MultiAgentDatabaseManager()
-consistency_manager = ConsistencyManager(multi_agent_db_manager) 
\ No newline at end of file
+def __getattr__(name: str):
+    """兼容 `from database.multi_agent_manager import multi_agent_db_manager` 的旧用法：首次访问时才创建实例"""
+    if name == "multi_agent_db_manager":
+        return get_multi_agent_db_manager()
+    if name == "consistency_manager":
+        return get_consistency_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
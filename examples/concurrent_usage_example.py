@@ -139,11 +139,12 @@ def performance_test():
             for _ in range(iterations):
                 thread_safe_db_manager.execute_query("SELECT COUNT(*) FROM users")
         elif operation_type == "write":
-            for i in range(iterations):
-                thread_safe_db_manager.execute_update(
-                    "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
-                    (f"性能测试用户{i}", f"perf{i}@example.com", 25)
-                )
+            # 批量写入：一次executemany、一个事务，衡量SQLite本身的吞吐而非逐条提交的开销
+            rows = [(f"性能测试用户{i}", f"perf{i}@example.com", 25) for i in range(iterations)]
+            thread_safe_db_manager.execute_many(
+                "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                rows
+            )
         
         end_time = time.time()
         duration = end_time - start_time
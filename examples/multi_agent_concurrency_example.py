@@ -1,15 +1,66 @@
 """
 多Agent并发控制示例 - 展示如何避免脏读和脏写
 """
-import threading
+import argparse
+import atexit
+import fcntl
+import functools
+import io
+import os
 import time
 import random
+import sqlite3
 import subprocess
 import sys
 import json
+import logging
+import tempfile
+from collections import deque
+from contextlib import closing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# 所有演示共用一个线程池，避免每个演示反复创建/回收工作线程
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-demo")
+atexit.register(_POOL.shutdown, wait=True)
+
+# 每个模拟服务器预生成的延迟数量
+_MOCK_DELAY_COUNT = 1024
+
+# 模拟查询结果（只读，所有线程共享同一份）
+_FAKE_ROWS = ({"id": 1, "name": "测试用户", "version": 5},)
+
+# 事务隔离级别演示的 (级别, 说明)
+_ISOLATION_LEVELS = (
+    ("read_uncommitted", "读未提交 - 可能发生脏读"),
+    ("read_committed", "读已提交 - 避免脏读"),
+    ("serializable", "串行化 - 最高隔离级别"),
+)
+
+# 乐观锁演示中单个Agent的最大重试次数
+_OCC_MAX_RETRIES = 3
+
+# 已运行过的演示及其返回值（交互式环境中重复调用时直接返回）
+_DEMO_RESULTS = {}
+
+
+def run_once(fn):
+    """让演示函数只真正执行一次，之后的调用直接返回首次结果；需要重跑时先调用 reset()"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if fn.__name__ not in _DEMO_RESULTS:
+            _DEMO_RESULTS[fn.__name__] = fn(*args, **kwargs)
+        return _DEMO_RESULTS[fn.__name__]
+    return wrapper
+
+
+def reset():
+    """清除演示运行记录，使所有演示可以再次执行"""
+    _DEMO_RESULTS.clear()
+
+
 # 模拟多个MCP Agent的并发访问
 class MockMCPServer:
     """模拟MCP服务器"""
@@ -18,20 +69,25 @@ class MockMCPServer:
         self.agent_id = agent_id
         self.db_path = db_path
         self.lock_file = f"{db_path}.{agent_id}.lock"
+        # 构造时预先生成模拟延迟，避免每次调用都争用全局随机数生成器
+        self._rng = random.Random(agent_id)
+        self._query_delays = deque(self._rng.uniform(0.1, 0.3) for _ in range(_MOCK_DELAY_COUNT))
+        self._update_delays = deque(self._rng.uniform(0.2, 0.5) for _ in range(_MOCK_DELAY_COUNT))
     
-    def execute_query(self, query: str, params: tuple = ()) -> list:
+    def execute_query(self, query: str, params: tuple = ()) -> tuple:
         """执行查询（模拟）"""
         # 在实际实现中，这里会调用数据库管理器
-        print(f"Agent {self.agent_id}: 执行查询 - {query}")
-        time.sleep(random.uniform(0.1, 0.3))
-        return [{"id": 1, "name": "测试用户", "version": random.randint(1, 10)}]
+        logger.debug("Agent %s: 执行查询 - %s", self.agent_id, query)
+        time.sleep(self._query_delays.popleft() if self._query_delays else self._rng.uniform(0.1, 0.3))
+        return _FAKE_ROWS
     
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """执行更新（模拟）"""
-        print(f"Agent {self.agent_id}: 执行更新 - {query}")
-        time.sleep(random.uniform(0.2, 0.5))
+        logger.debug("Agent %s: 执行更新 - %s", self.agent_id, query)
+        time.sleep(self._update_delays.popleft() if self._update_delays else self._rng.uniform(0.2, 0.5))
         return 1
 
+@run_once
 def demonstrate_dirty_read_problem():
     """演示脏读问题"""
     print("=== 脏读问题演示 ===")
@@ -56,15 +112,15 @@ def demonstrate_dirty_read_problem():
         return result
     
     # 并发执行
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future1 = executor.submit(agent1_operation)
-        future2 = executor.submit(agent2_operation)
-        
-        result1 = future1.result()
-        result2 = future2.result()
+    future1 = _POOL.submit(agent1_operation)
+    future2 = _POOL.submit(agent2_operation)
+    
+    result1 = future1.result()
+    result2 = future2.result()
     
     print("问题：Agent1可能读取到Agent2正在修改的数据（脏读）")
 
+@run_once
 def demonstrate_dirty_write_problem():
     """演示脏写问题"""
     print("\n=== 脏写问题演示 ===")
@@ -89,15 +145,15 @@ def demonstrate_dirty_write_problem():
         return result
     
     # 并发执行
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future1 = executor.submit(agent1_write)
-        future2 = executor.submit(agent2_write)
-        
-        future1.result()
-        future2.result()
+    future1 = _POOL.submit(agent1_write)
+    future2 = _POOL.submit(agent2_write)
+    
+    future1.result()
+    future2.result()
     
     print("问题：两个Agent同时修改同一数据，可能导致数据不一致（脏写）")
 
+@run_once
 def demonstrate_solution_with_locks():
     """演示使用锁的解决方案"""
     print("\n=== 使用锁的解决方案 ===")
@@ -105,165 +161,162 @@ def demonstrate_solution_with_locks():
     # 模拟文件锁机制
     lock_file = "data/test.db.lock"
     
-    def acquire_lock(agent_id: str, timeout: int = 5) -> bool:
-        """获取锁"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                with open(lock_file, 'w') as f:
-                    f.write(agent_id)
-                return True
-            except:
-                time.sleep(0.1)
-        return False
+    def acquire_lock(agent_id: str) -> int:
+        """获取锁（阻塞等待，锁释放时由内核唤醒，无需轮询），返回持有锁的文件描述符"""
+        # 锁文件常驻、释放时不删除：删除后重建会让等待者锁住已失效的旧文件
+        fd = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.ftruncate(fd, 0)
+        os.write(fd, agent_id.encode())
+        return fd
     
-    def release_lock():
+    def release_lock(fd: int):
         """释放锁"""
-        try:
-            Path(lock_file).unlink(missing_ok=True)
-        except:
-            pass
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
     
     def agent1_safe_operation():
         """Agent1的安全操作"""
         print("Agent1: 尝试获取锁...")
-        if acquire_lock("Agent-1"):
-            try:
-                print("Agent1: 获取锁成功，执行操作...")
-                time.sleep(1)  # 模拟操作时间
-                print("Agent1: 操作完成")
-            finally:
-                release_lock()
-                print("Agent1: 释放锁")
-        else:
-            print("Agent1: 获取锁失败")
+        fd = acquire_lock("Agent-1")
+        try:
+            print("Agent1: 获取锁成功，执行操作...")
+            time.sleep(1)  # 模拟操作时间
+            print("Agent1: 操作完成")
+        finally:
+            release_lock(fd)
+            print("Agent1: 释放锁")
     
     def agent2_safe_operation():
         """Agent2的安全操作"""
         print("Agent2: 尝试获取锁...")
-        if acquire_lock("Agent-2"):
-            try:
-                print("Agent2: 获取锁成功，执行操作...")
-                time.sleep(1)  # 模拟操作时间
-                print("Agent2: 操作完成")
-            finally:
-                release_lock()
-                print("Agent2: 释放锁")
-        else:
-            print("Agent2: 获取锁失败")
+        fd = acquire_lock("Agent-2")
+        try:
+            print("Agent2: 获取锁成功，执行操作...")
+            time.sleep(1)  # 模拟操作时间
+            print("Agent2: 操作完成")
+        finally:
+            release_lock(fd)
+            print("Agent2: 释放锁")
     
     # 并发执行
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future1 = executor.submit(agent1_safe_operation)
-        future2 = executor.submit(agent2_safe_operation)
-        
-        future1.result()
-        future2.result()
+    future1 = _POOL.submit(agent1_safe_operation)
+    future2 = _POOL.submit(agent2_safe_operation)
+    
+    future1.result()
+    future2.result()
     
     print("解决方案：使用文件锁确保同一时间只有一个Agent可以修改数据")
 
+@run_once
 def demonstrate_optimistic_locking():
     """演示乐观锁解决方案"""
     print("\n=== 乐观锁解决方案 ===")
     
     class OptimisticLockManager:
-        def __init__(self):
-            self.data = {"id": 1, "name": "用户", "version": 1}
-            self.lock = threading.Lock()
+        """基于SQLite的乐观锁：比较与更新由一条 UPDATE ... WHERE version = ? 在存储层原子完成"""
+        
+        def __init__(self, db_path: str):
+            self.db_path = db_path
+            with closing(sqlite3.connect(db_path)) as conn:
+                conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, version INTEGER)")
+                conn.execute("INSERT INTO users (id, name, version) VALUES (1, '用户', 1)")
+                conn.commit()
+        
+        def _connect(self) -> sqlite3.Connection:
+            """每次操作使用独立连接（自动提交模式），模拟不同Agent进程"""
+            return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
         
         def read_data(self, agent_id: str):
             """读取数据"""
-            with self.lock:
-                print(f"{agent_id}: 读取数据 - {self.data}")
-                return self.data.copy()
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT id, name, version FROM users WHERE id = ?", (1,)).fetchone()
+            data = {"id": row[0], "name": row[1], "version": row[2]}
+            print(f"{agent_id}: 读取数据 - {data}")
+            return data
         
         def update_data(self, agent_id: str, new_name: str, expected_version: int):
-            """更新数据（乐观锁）"""
-            with self.lock:
-                if self.data["version"] != expected_version:
-                    print(f"{agent_id}: 版本冲突！期望版本 {expected_version}，实际版本 {self.data['version']}")
-                    return False
-                
-                self.data["name"] = new_name
-                self.data["version"] += 1
-                print(f"{agent_id}: 更新成功 - {self.data}")
-                return True
-    
-    manager = OptimisticLockManager()
+            """更新数据（乐观锁，版本号不匹配时影响行数为0）"""
+            with closing(self._connect()) as conn:
+                cursor = conn.execute(
+                    "UPDATE users SET name = ?, version = version + 1 WHERE id = ? AND version = ?",
+                    (new_name, 1, expected_version)
+                )
+            if cursor.rowcount != 1:
+                print(f"{agent_id}: 版本冲突！期望版本 {expected_version} 已过期")
+                return False
+            
+            print(f"{agent_id}: 更新成功 - 版本 {expected_version} -> {expected_version + 1}")
+            return True
     
-    def agent1_optimistic_operation():
-        """Agent1的乐观锁操作"""
-        print("Agent1: 开始乐观锁操作...")
-        # 读取数据
-        data = manager.read_data("Agent1")
-        time.sleep(0.5)  # 模拟处理时间
-        
-        # 尝试更新
-        success = manager.update_data("Agent1", "Agent1修改的名字", data["version"])
-        if success:
-            print("Agent1: 更新成功")
-        else:
-            print("Agent1: 更新失败，需要重试")
-    
-    def agent2_optimistic_operation():
-        """Agent2的乐观锁操作"""
-        print("Agent2: 开始乐观锁操作...")
-        # 读取数据
-        data = manager.read_data("Agent2")
-        time.sleep(0.3)  # 模拟处理时间
+    def optimistic_operation(agent_id: str, new_name: str, work_time: float):
+        """乐观锁操作：读取 -> 处理 -> 按版本号更新，冲突时重新读取后重试"""
+        print(f"{agent_id}: 开始乐观锁操作...")
+        for attempt in range(1, _OCC_MAX_RETRIES + 1):
+            # 读取数据
+            data = manager.read_data(agent_id)
+            time.sleep(work_time)  # 模拟处理时间
+            
+            # 尝试更新
+            if manager.update_data(agent_id, new_name, data["version"]):
+                print(f"{agent_id}: 第 {attempt} 次尝试更新成功")
+                return True
+            print(f"{agent_id}: 更新失败，重新读取后重试")
         
-        # 尝试更新
-        success = manager.update_data("Agent2", "Agent2修改的名字", data["version"])
-        if success:
-            print("Agent2: 更新成功")
-        else:
-            print("Agent2: 更新失败，需要重试")
+        print(f"{agent_id}: 超过最大重试次数，放弃更新")
+        return False
     
-    # 并发执行
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future1 = executor.submit(agent1_optimistic_operation)
-        future2 = executor.submit(agent2_optimistic_operation)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = OptimisticLockManager(str(Path(tmp_dir) / "occ_demo.db"))
+        
+        # 并发执行
+        future1 = _POOL.submit(optimistic_operation, "Agent1", "Agent1修改的名字", 0.5)
+        future2 = _POOL.submit(optimistic_operation, "Agent2", "Agent2修改的名字", 0.3)
         
         future1.result()
         future2.result()
+        
+        manager.read_data("最终结果")
     
     print("解决方案：使用乐观锁，只有在版本匹配时才允许更新")
 
+@run_once
 def demonstrate_transaction_isolation():
     """演示事务隔离级别"""
     print("\n=== 事务隔离级别演示 ===")
     
-    isolation_levels = {
-        "read_uncommitted": "读未提交 - 可能发生脏读",
-        "read_committed": "读已提交 - 避免脏读",
-        "serializable": "串行化 - 最高隔离级别"
-    }
+    def simulate_transaction(agent_id: str, isolation: str, out: io.StringIO):
+        """模拟事务，输出先写入缓冲区，由主线程统一输出"""
+        out.write(f"{agent_id}: 开始事务 ({isolation})...\n")
+        if isolation == "serializable":
+            out.write(f"{agent_id}: 获取排他锁\n")
+            time.sleep(0.5)
+            out.write(f"{agent_id}: 执行操作\n")
+            time.sleep(0.3)
+            out.write(f"{agent_id}: 提交事务，释放锁\n")
+        else:
+            out.write(f"{agent_id}: 执行操作\n")
+            time.sleep(0.3)
+            out.write(f"{agent_id}: 提交事务\n")
     
-    for level, description in isolation_levels.items():
+    for level, description in _ISOLATION_LEVELS:
         print(f"\n{level}: {description}")
         
-        def simulate_transaction(agent_id: str, isolation: str):
-            print(f"{agent_id}: 开始事务 ({isolation})...")
-            if isolation == "serializable":
-                print(f"{agent_id}: 获取排他锁")
-                time.sleep(0.5)
-                print(f"{agent_id}: 执行操作")
-                time.sleep(0.3)
-                print(f"{agent_id}: 提交事务，释放锁")
-            else:
-                print(f"{agent_id}: 执行操作")
-                time.sleep(0.3)
-                print(f"{agent_id}: 提交事务")
+        buf1, buf2 = io.StringIO(), io.StringIO()
+        future1 = _POOL.submit(simulate_transaction, "Agent1", level, buf1)
+        future2 = _POOL.submit(simulate_transaction, "Agent2", level, buf2)
         
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future1 = executor.submit(simulate_transaction, "Agent1", level)
-            future2 = executor.submit(simulate_transaction, "Agent2", level)
-            
-            future1.result()
-            future2.result()
+        future1.result()
+        future2.result()
+        sys.stdout.write(buf1.getvalue() + buf2.getvalue())
 
-def main():
+def main(argv=None):
     """主函数"""
+    parser = argparse.ArgumentParser(description="多Agent并发控制演示")
+    parser.add_argument("--force", action="store_true", help="忽略运行记录，重新执行所有演示")
+    if parser.parse_args(argv).force:
+        reset()
+    
     print("多Agent并发控制演示")
     print("=" * 50)
     
@@ -9,95 +9,143 @@ import json
 import logging
 from mcp.natural_language_server import create_natural_language_server
 
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时退回标准库json
+    orjson = None
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def test_natural_language_operations():
-    """测试自然语言操作"""
-    server = create_natural_language_server()
-    
-    # 测试用例
-    test_cases = [
-        {
-            "name": "自然语言建表 - 用户表",
-            "tool": "natural_language_create_table",
-            "arguments": {
-                "description": "创建一个用户表，包含姓名、年龄、邮箱字段"
-            }
-        },
-        {
-            "name": "自然语言建表 - 产品表",
-            "tool": "natural_language_create_table",
-            "arguments": {
-                "description": "创建一个产品表，包含名称、价格、分类字段"
-            }
-        },
-        {
-            "name": "自然语言插入 - 用户数据",
-            "tool": "natural_language_insert",
-            "arguments": {
-                "description": "向用户表插入一个叫张三的用户，年龄25岁"
-            }
-        },
-        {
-            "name": "自然语言插入 - 产品数据",
-            "tool": "natural_language_insert",
-            "arguments": {
-                "description": "向产品表插入一个叫笔记本电脑的产品，价格5999元"
-            }
-        },
-        {
-            "name": "自然语言查询 - 查询用户",
-            "tool": "natural_language_query",
-            "arguments": {
-                "description": "查询所有年龄大于20的用户"
-            }
-        },
-        {
-            "name": "自然语言更新 - 更新用户年龄",
-            "tool": "natural_language_update",
-            "arguments": {
-                "description": "将用户张三的年龄改为26岁"
-            }
-        },
-        {
-            "name": "列出所有表",
-            "tool": "list_tables",
-            "arguments": {}
-        },
-        {
-            "name": "数据库信息",
-            "tool": "database_info",
-            "arguments": {}
+def _dumps(obj) -> str:
+    """格式化输出JSON（保留中文、缩进2格）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def _rpc(request_id: int, name: str, arguments: dict) -> dict:
+    """构造 tools/call 的JSON-RPC请求"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": name, "arguments": arguments}
+    }
+
+
+# 自然语言测试用例
+_NL_CASES = (
+    {
+        "name": "自然语言建表 - 用户表",
+        "tool": "natural_language_create_table",
+        "arguments": {
+            "description": "创建一个用户表，包含姓名、年龄、邮箱字段"
         }
-    ]
-    
+    },
+    {
+        "name": "自然语言建表 - 产品表",
+        "tool": "natural_language_create_table",
+        "arguments": {
+            "description": "创建一个产品表，包含名称、价格、分类字段"
+        }
+    },
+    {
+        "name": "自然语言插入 - 用户数据",
+        "tool": "natural_language_insert",
+        "arguments": {
+            "description": "向用户表插入一个叫张三的用户，年龄25岁"
+        }
+    },
+    {
+        "name": "自然语言插入 - 产品数据",
+        "tool": "natural_language_insert",
+        "arguments": {
+            "description": "向产品表插入一个叫笔记本电脑的产品，价格5999元"
+        }
+    },
+    {
+        "name": "自然语言查询 - 查询用户",
+        "tool": "natural_language_query",
+        "arguments": {
+            "description": "查询所有年龄大于20的用户"
+        }
+    },
+    {
+        "name": "自然语言更新 - 更新用户年龄",
+        "tool": "natural_language_update",
+        "arguments": {
+            "description": "将用户张三的年龄改为26岁"
+        }
+    },
+    {
+        "name": "列出所有表",
+        "tool": "list_tables",
+        "arguments": {}
+    },
+    {
+        "name": "数据库信息",
+        "tool": "database_info",
+        "arguments": {}
+    }
+)
+
+# 按依赖关系划分的执行阶段（_NL_CASES下标）：先建表，再插入，最后查询/更新/元信息
+_NL_STAGES = ((0, 1), (2, 3), (4, 5, 6, 7))
+
+# SQL测试用例
+_SQL_CASES = (
+    {
+        "name": "SQL查询 - 查询所有用户",
+        "tool": "sql_query",
+        "arguments": {
+            "query": "SELECT * FROM 用户"
+        }
+    },
+    {
+        "name": "SQL插入 - 插入用户数据",
+        "tool": "sql_update",
+        "arguments": {
+            "query": "INSERT INTO 用户 (姓名, 年龄, 邮箱) VALUES (?, ?, ?)",
+            "params": ["李四", 30, "lisi@example.com"]
+        }
+    },
+    {
+        "name": "SQL更新 - 更新产品价格",
+        "tool": "sql_update",
+        "arguments": {
+            "query": "UPDATE 产品 SET 价格 = ? WHERE 名称 = ?",
+            "params": [5500, "笔记本电脑"]
+        }
+    }
+)
+
+
+async def test_natural_language_operations(server):
+    """测试自然语言操作"""
     print("=== 自然语言MCP服务器测试 ===\n")
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"测试 {i}: {test_case['name']}")
-        print(f"工具: {test_case['tool']}")
-        print(f"参数: {json.dumps(test_case['arguments'], ensure_ascii=False, indent=2)}")
+    for stage in _NL_STAGES:
+        # 同一阶段内的用例互不依赖，并发分发
+        requests = [_rpc(i + 1, _NL_CASES[i]['tool'], _NL_CASES[i]['arguments']) for i in stage]
+        responses = await asyncio.gather(
+            *(server.handle_request(request) for request in requests),
+            return_exceptions=True
+        )
         
-        try:
-            # 构造请求
-            request = {
-                "jsonrpc": "2.0",
-                "id": i,
-                "method": "tools/call",
-                "params": {
-                    "name": test_case['tool'],
-                    "arguments": test_case['arguments']
-                }
-            }
-            
-            # 处理请求
-            response = await server.handle_request(request)
+        for i, response in zip(stage, responses):
+            test_case = _NL_CASES[i]
+            print(f"测试 {i + 1}: {test_case['name']}")
+            print(f"工具: {test_case['tool']}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("参数: %s", _dumps(test_case['arguments']))
             
             # 显示结果
-            if "result" in response:
+            if isinstance(response, Exception):
+                print(f"执行失败: {response}")
+            elif "result" in response:
                 content = response["result"].get("content", [])
                 if content:
                     print(f"结果: {content[0].get('text', '')}")
@@ -106,58 +154,19 @@ async def test_natural_language_operations():
             elif "error" in response:
                 print(f"错误: {response['error']['message']}")
             
-        except Exception as e:
-            print(f"执行失败: {e}")
-        
-        print("-" * 50)
+            print("-" * 50)
 
 
-async def test_sql_operations():
+async def test_sql_operations(server):
     """测试SQL操作"""
-    server = create_natural_language_server()
-    
-    sql_test_cases = [
-        {
-            "name": "SQL查询 - 查询所有用户",
-            "tool": "sql_query",
-            "arguments": {
-                "query": "SELECT * FROM 用户"
-            }
-        },
-        {
-            "name": "SQL插入 - 插入用户数据",
-            "tool": "sql_update",
-            "arguments": {
-                "query": "INSERT INTO 用户 (姓名, 年龄, 邮箱) VALUES (?, ?, ?)",
-                "params": ["李四", 30, "lisi@example.com"]
-            }
-        },
-        {
-            "name": "SQL更新 - 更新产品价格",
-            "tool": "sql_update",
-            "arguments": {
-                "query": "UPDATE 产品 SET 价格 = ? WHERE 名称 = ?",
-                "params": [5500, "笔记本电脑"]
-            }
-        }
-    ]
-    
     print("\n=== SQL操作测试 ===\n")
     
-    for i, test_case in enumerate(sql_test_cases, 1):
+    for i, test_case in enumerate(_SQL_CASES, 1):
         print(f"SQL测试 {i}: {test_case['name']}")
         print(f"SQL: {test_case['arguments']['query']}")
         
         try:
-            request = {
-                "jsonrpc": "2.0",
-                "id": i,
-                "method": "tools/call",
-                "params": {
-                    "name": test_case['tool'],
-                    "arguments": test_case['arguments']
-                }
-            }
+            request = _rpc(i, test_case['tool'], test_case['arguments'])
             
             response = await server.handle_request(request)
             
@@ -177,11 +186,14 @@ async def test_sql_operations():
 async def main():
     """主函数"""
     try:
+        # 两组测试共用同一个服务器实例
+        server = create_natural_language_server()
+        
         # 测试自然语言操作
-        await test_natural_language_operations()
+        await test_natural_language_operations(server)
         
         # 测试SQL操作
-        await test_sql_operations()
+        await test_sql_operations(server)
         
         print("\n=== 测试完成 ===")
         
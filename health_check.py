@@ -8,24 +8,28 @@ import asyncio
 import json
 import sys
 import logging
-from pathlib import Path
+from functools import lru_cache
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
-
-from mcp.enhanced_server import create_enhanced_server
+# 以脚本方式运行时，脚本所在的项目根目录已位于sys.path首位，无需再手动插入
+from mcp.launcher import install_uvloop
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _get_server():
+    """创建并缓存MCP服务器实例（延迟导入服务器模块，真正执行检查时才加载）"""
+    from mcp.enhanced_server import create_enhanced_server
+    return create_enhanced_server()
+
+
 async def health_check():
     """执行健康检查"""
     try:
         # 创建MCP服务器实例
-        server = create_enhanced_server()
+        server = _get_server()
         
         # 测试初始化
         init_request = {
@@ -54,12 +58,6 @@ async def health_check():
             "params": {}
         }
         
-        tools_response = await server.handle_request(tools_request)
-        
-        if "error" in tools_response:
-            logger.error(f"获取工具列表失败: {tools_response['error']}")
-            return False
-        
         # 测试数据库连接
         db_request = {
             "jsonrpc": "2.0",
@@ -71,7 +69,15 @@ async def health_check():
             }
         }
         
-        db_response = await server.handle_request(db_request)
+        # 初始化完成后，工具列表与数据库连接两项检查互不依赖，并发执行
+        tools_response, db_response = await asyncio.gather(
+            server.handle_request(tools_request),
+            server.handle_request(db_request)
+        )
+        
+        if "error" in tools_response:
+            logger.error(f"获取工具列表失败: {tools_response['error']}")
+            return False
         
         if "error" in db_response:
             logger.error(f"数据库连接失败: {db_response['error']}")
@@ -89,6 +95,7 @@ def main():
     """主函数"""
     try:
         # 运行健康检查
+        install_uvloop()
         result = asyncio.run(health_check())
         
         if result:
@@ -3,18 +3,430 @@
 符合标准MCP协议 (2024-11-05)
 """
 import asyncio
+import copy
 import json
 import logging
+import os
+import re
+import stat
 import sys
 import uuid
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Any, Dict, List, Optional
-from database.connection import db_manager, thread_safe_db_manager
+from database.connection import get_db_manager, get_thread_safe_db_manager
 from config.settings import settings
 from mcp.natural_language_tools import natural_language_query
 
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 未安装orjson时使用的标准库编解码器，模块加载时创建一次，避免每次调用都重新构造
+_decoder = json.JSONDecoder()
+_encoder = json.JSONEncoder(ensure_ascii=False)
+_encoder_pretty = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+# 单行请求的最大字节数（StreamReader默认64KiB，批量事务请求可能超出）
+_STDIN_LINE_LIMIT = 16 * 1024 * 1024
+
+# 合法的表名：字母（含中文）或下划线开头，由字母、数字、下划线组成，最长64个字符
+_IDENT_RE = re.compile(r'^[^\W\d]\w{0,63}$')
+
+# 元数据查询（表列表、表结构、数据库信息）结果的缓存秒数
+_META_CACHE_TTL = 2.0
+
+# 会修改数据库的工具，调用后清空元数据缓存（自然语言查询可能建表或写入数据）
+_WRITE_TOOLS = frozenset({
+    "sql_update", "sql_transaction", "create_table", "initialize_time_slots", "repair_database",
+    "natural_language_query"
+})
+
+# stdio模式下JSON解析失败时的固定响应（无法得知请求id，按JSON-RPC规范id为null）
+_PARSE_ERROR_LINE = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32700,"message":"Parse error"}}'
+
+# 初始化完成前允许调用的方法
+_PRE_INIT_METHODS = frozenset({"initialize", "notifications/initialized"})
+
+# 只读元数据工具：相同参数的并发调用合并为一次执行，结果共享
+_COALESCED_TOOLS = frozenset({"list_tables", "describe_table", "database_info"})
+
+# 只读工具使用的固定SQL，启动时登记为命名语句，每次以同一文本执行以命中预编译语句缓存
+_LIST_TABLES_SQL = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+_SCHEMA_VERSION_SQL = "PRAGMA schema_version"
+# 表值函数形式可以参数化表名，所有表共用同一条语句
+_TABLE_INFO_SQL = "SELECT * FROM pragma_table_info(?)"
+_CREATE_STMT_SQL = "SELECT sql FROM sqlite_master WHERE type='table' AND name=?"
+# 一次查询同时取得数据库大小与表名（LEFT JOIN保证无表时也返回大小）
+_DB_INFO_SQL = (
+    "SELECT s.size, t.name FROM "
+    "(SELECT page_count * page_size AS size FROM pragma_page_count(), pragma_page_size()) AS s "
+    "LEFT JOIN "
+    "(SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%') AS t "
+    "ORDER BY t.name"
+)
+
+# 所有用户表的全部列（每行为一列，按表名、列序号排序），一次查询取得整个数据库结构
+_SCHEMA_COLUMNS_SQL = (
+    "SELECT m.name AS table_name, p.* FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+    "WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%' ORDER BY m.name, p.cid"
+)
+
+# 语句名称 -> SQL
+_STATEMENTS = {
+    "list_tables": _LIST_TABLES_SQL,
+    "schema_version": _SCHEMA_VERSION_SQL,
+    "table_info": _TABLE_INFO_SQL,
+    "create_statement": _CREATE_STMT_SQL,
+    "database_info": _DB_INFO_SQL,
+    "schema_columns": _SCHEMA_COLUMNS_SQL,
+}
+
+
+def _check_table_name(table_name: str) -> None:
+    """
+    校验表名，不合法时直接报错，避免拼接进SQL后再由数据库解析失败（同时防止注入）
+    
+    Args:
+        table_name: 表名
+        
+    Raises:
+        ValueError: 表名不合法
+    """
+    if not isinstance(table_name, str) or not _IDENT_RE.match(table_name):
+        raise ValueError(f"非法的表名: {table_name!r}")
+
+
+def _json_loads(data):
+    """解析JSON请求（优先使用orjson）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode()
+    return _decoder.decode(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """紧凑序列化JSON-RPC响应为UTF-8字节（保留中文）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson不支持的值（如超出64位的整数）交给标准库处理
+            pass
+    return _encoder.encode(obj).encode()
+
+
+def _write_line(data: bytes) -> None:
+    """将一条响应连同换行符一次写入标准输出的底层字节流并刷新"""
+    stdout = sys.stdout.buffer
+    stdout.write(data + b"\n")
+    stdout.flush()
+
+
+def _is_valid_request(request: Any) -> bool:
+    """校验JSON-RPC请求的基本结构：对象、method为字符串、params（若有）为对象"""
+    return (
+        isinstance(request, dict)
+        and isinstance(request.get("method"), str)
+        and isinstance(request.get("params", {}), dict)
+    )
+
+
+def _is_write_call(request: Dict[str, Any]) -> bool:
+    """
+    判断请求是否为写工具调用
+    
+    Args:
+        request: 已校验的JSON-RPC请求
+        
+    Returns:
+        是否为_WRITE_TOOLS中的工具调用
+    """
+    if request["method"] != "tools/call":
+        return False
+    params = request.get("params")
+    return isinstance(params, dict) and params.get("name") in _WRITE_TOOLS
+
+
+def _invalid_request(request: Any) -> Dict[str, Any]:
+    """构造 Invalid Request 错误响应（请求本身不是对象时id为null）"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request.get("id") if isinstance(request, dict) else None,
+        "error": {"code": -32600, "message": "Invalid Request"}
+    }
+
+
+def _method_not_found_line(request_id: Any, method: Any) -> bytes:
+    """拼接 Method not found 错误响应的JSON字节（只序列化id与方法名）"""
+    return (b'{"jsonrpc":"2.0","id":' + _json_dumps(request_id)
+            + b',"error":{"code":-32601,"message":' + _json_dumps(f"Method not found: {method}") + b'}}')
+
+
+def _json_pretty(obj: Any) -> str:
+    """缩进2格格式化工具结果文本（保留中文）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return _encoder_pretty.encode(obj)
+
+
+# 工具、通知、资源定义在模块加载时构造一次，所有服务器实例共享（只读；交给实例与调用方时深拷贝）
+_TOOLS = (
+    {
+        "name": "sql_query",
+        "description": "执行SQL查询语句，返回查询结果。支持SELECT语句，可以查询数据、统计信息等。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "SQL查询语句，如：SELECT * FROM users WHERE age > 18"},
+                "params": {"type": "array", "items": {"type": "string"}, "description": "查询参数列表"},
+                "consistency_level": {
+                    "type": "string", 
+                    "description": "一致性级别（当前数据库管理器不区分级别，此参数仅为兼容保留）",
+                    "default": "read_committed"
+                },
+                "max_rows": {"type": "integer", "description": "最多返回的行数，不填则返回全部结果", "minimum": 1}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "sql_update",
+        "description": "执行SQL更新语句，包括INSERT、UPDATE、DELETE操作。用于添加、修改、删除数据。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "SQL更新语句，如：INSERT INTO users (name, age) VALUES (?, ?)"},
+                "params": {"type": "array", "items": {"type": "string"}, "description": "更新参数列表"}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "sql_transaction",
+        "description": "执行事务操作，支持多个SQL语句的原子性执行。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "operations": {
+                    "type": "array", 
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "query": {"type": "string"},
+                            "params": {"type": "array", "items": {"type": "string"}}
+                        },
+                        "required": ["query"]
+                    },
+                    "description": "操作列表"
+                },
+                "isolation_level": {
+                    "type": "string", 
+                    "description": "隔离级别（事务始终以BEGIN IMMEDIATE串行执行，此参数仅为兼容保留）",
+                    "default": "serializable"
+                }
+            },
+            "required": ["operations"]
+        }
+    },
+    {
+        "name": "natural_language_query",
+        "description": "使用自然语言进行数据库操作，支持中文和英文。可以创建表、插入数据、查询数据、更新数据、删除数据等。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string", 
+                    "description": "自然语言查询，例如：'创建表 用户 包含 姓名:文本,年龄:数字,邮箱:文本' 或 '插入 姓名=张三,年龄=25 到 用户'"
+                },
+                "agent_id": {
+                    "type": "string", 
+                    "description": "代理ID，用于并发控制",
+                    "default": "nl_agent"
+                }
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "list_tables",
+        "description": "列出数据库中的所有表。用于了解数据库结构。",
+        "inputSchema": {
+            "type": "object", 
+            "properties": {
+                "consistency_level": {
+                    "type": "string", 
+                    "description": "一致性级别（当前数据库管理器不区分级别，此参数仅为兼容保留）",
+                    "default": "read_committed"
+                }
+            }
+        }
+    },
+    {
+        "name": "describe_table",
+        "description": "描述指定表的结构，包括列名、数据类型、约束等信息。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "表名"},
+                "consistency_level": {
+                    "type": "string", 
+                    "description": "一致性级别（当前数据库管理器不区分级别，此参数仅为兼容保留）",
+                    "default": "read_committed"
+                }
+            },
+            "required": ["table_name"]
+        }
+    },
+    {
+        "name": "create_table",
+        "description": "创建新表。可以定义表结构、列类型、约束等。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "表名"},
+                "columns": {"type": "string", "description": "列定义SQL语句，如：id INTEGER PRIMARY KEY, name TEXT NOT NULL"}
+            },
+            "required": ["table_name", "columns"]
+        }
+    },
+    {
+        "name": "database_info",
+        "description": "获取数据库基本信息，包括表数量、数据库大小等统计信息。",
+        "inputSchema": {
+            "type": "object", 
+            "properties": {
+                "consistency_level": {
+                    "type": "string", 
+                    "description": "一致性级别（当前数据库管理器不区分级别，此参数仅为兼容保留）",
+                    "default": "read_committed"
+                }
+            }
+        }
+    },
+    {
+        "name": "agent_status",
+        "description": "获取当前Agent的状态信息，包括Agent ID、会话ID等。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "check_database_status",
+        "description": "检查数据库状态，包括表结构、数据量等统计信息。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "initialize_time_slots",
+        "description": "初始化时段库存数据，生成未来7天的可用时段。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "repair_database",
+        "description": "修复数据库，检查并修复数据完整性问题。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "transaction_history",
+        "description": "获取事务历史记录，用于调试和监控。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "limit": {
+                    "type": "integer", 
+                    "description": "返回的记录数量限制",
+                    "default": 100
+                }
+            }
+        }
+    }
+)
+
+_NOTIFICATIONS = (
+    {
+        "name": "database_changed",
+        "description": "数据库发生变化时的通知"
+    },
+    {
+        "name": "transaction_committed",
+        "description": "事务提交成功的通知"
+    },
+    {
+        "name": "agent_connected",
+        "description": "Agent连接成功的通知"
+    },
+    {
+        "name": "natural_language_query_executed",
+        "description": "自然语言查询执行完成的通知"
+    }
+)
+
+_RESOURCES = (
+    {
+        "uri": "sqlite:///restaurants",
+        "name": "restaurants",
+        "description": "餐厅信息",
+        "mimeType": "application/json"
+    },
+    {
+        "uri": "sqlite:///table_types",
+        "name": "table_types",
+        "description": "桌型信息",
+        "mimeType": "application/json"
+    },
+    {
+        "uri": "sqlite:///database_schema",
+        "name": "database_schema",
+        "description": "数据库结构信息",
+        "mimeType": "application/json"
+    }
+)
+
+# 工具名 -> 必需参数名，调用前先校验，缺参数时不再进入数据库（query_database为sql_query的别名）
+_TOOL_REQUIRED = {tool["name"]: tuple(tool["inputSchema"].get("required", ())) for tool in _TOOLS}
+_TOOL_REQUIRED["query_database"] = _TOOL_REQUIRED["sql_query"]
+
+# 各list方法的结果
+_TOOLS_RESULT = {"tools": _TOOLS}
+_NOTIFICATIONS_RESULT = {"notifications": [
+    {"name": notification["name"], "description": notification["description"]}
+    for notification in _NOTIFICATIONS
+]}
+_RESOURCES_RESULT = {"resources": [
+    {
+        "uri": resource["uri"],
+        "name": resource["name"],
+        "description": resource["description"],
+        "mimeType": resource["mimeType"]
+    }
+    for resource in _RESOURCES
+]}
+
+# 方法名 -> 预先序列化的result字节
+_STATIC_RESULT_JSON = {
+    "tools/list": _json_dumps(_TOOLS_RESULT),
+    "notifications/list": _json_dumps(_NOTIFICATIONS_RESULT),
+    "resources/list": _json_dumps(_RESOURCES_RESULT),
+}
+
 
 class EnhancedMCPServer:
     """增强版MCP服务器 - 支持多Agent并发控制，符合标准MCP协议"""
@@ -29,7 +441,12 @@ class EnhancedMCPServer:
         """
         self.agent_id = agent_id or str(uuid.uuid4())
         self.use_thread_safe = use_thread_safe
-        self.db_manager = thread_safe_db_manager if use_thread_safe else db_manager
+        self.db_manager = get_thread_safe_db_manager() if use_thread_safe else get_db_manager()
+        self._bind_db_methods()
+        
+        # 同步数据库调用放到专用线程池执行，避免阻塞事件循环；信号量限制同时在途的数据库调用数
+        self._db_executor = ThreadPoolExecutor(max_workers=settings.db_pool_size, thread_name_prefix="mcp-db")
+        self._db_sem = asyncio.Semaphore(settings.db_pool_size)
         
         # 标准MCP协议属性
         self.server_name = "sqlite-mcp-server"
@@ -37,293 +454,110 @@ class EnhancedMCPServer:
         self.protocol_version = "2024-11-05"
         self.initialized = False
         
-        # 定义工具、通知和资源
-        self.tools = self._define_tools()
-        self.notifications = self._define_notifications()
-        self.resources = self._define_resources()
+        # 定义工具、通知和资源（深拷贝模块级定义，实例修改不影响其他实例）
+        self.tools = copy.deepcopy(list(_TOOLS))
+        self.notifications = copy.deepcopy(list(_NOTIFICATIONS))
+        self.resources = copy.deepcopy(list(_RESOURCES))
+        
+        # 元数据查询缓存: (语句名称, params, as_tuples) -> (写入时间, 结果)
+        self._meta_cache: Dict[tuple, tuple] = {}
+        # 表结构描述缓存: table_name -> (schema_version, 渲染后的文本)
+        self._describe_cache: Dict[str, tuple] = {}
+        # 数据库结构资源缓存: (schema_version, 结构数据)
+        self._schema_cache: Optional[tuple] = None
+        # 执行中的只读元数据调用: (工具名, 参数JSON) -> Future
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        
+        # JSON-RPC方法名 -> 处理方法
+        self._method_handlers = {
+            "initialize": self._initialize,
+            "tools/list": self._list_tools,
+            "tools/call": self._call_tool,
+            "notifications/list": self._list_notifications,
+            "notifications/initialized": self._handle_initialized_notification,  # 通知不需要返回响应
+            "resources/list": self._list_resources,
+            "resources/read": self._read_resource,
+            "shutdown": self._handle_shutdown,
+        }
+        
+        # 工具名 -> 处理方法（支持 query_database 作为 sql_query 的别名）
+        self._tool_handlers = {
+            "sql_query": self._execute_query,
+            "query_database": self._execute_query,
+            "sql_update": self._execute_update,
+            "sql_transaction": self._execute_transaction,
+            "natural_language_query": self._execute_natural_language_query,
+            "list_tables": self._list_tables,
+            "describe_table": self._describe_table,
+            "create_table": self._create_table,
+            "database_info": self._database_info,
+            "agent_status": self._agent_status,
+            "check_database_status": self._check_database_status,
+            "initialize_time_slots": self._initialize_time_slots,
+            "repair_database": self._repair_database,
+            "transaction_history": self._transaction_history,
+        }
+        
+        self._tool_required = _TOOL_REQUIRED
+        
+        # agent_status回退输出中只有timestamp会变化，预先渲染其余部分，调用时只拼接时间戳
+        static_status = _json_pretty({
+            "agent_id": self.agent_id,
+            "use_thread_safe": self.use_thread_safe,
+            "database_path": settings.database_path
+        })
+        self._agent_status_prefix = f'Agent状态:\n{static_status[:-2]},\n  "timestamp": '
+        
+        # 工具、通知、资源列表不再变化，直接使用模块级预先生成的结果及其JSON字节（结果交出前深拷贝，模块级定义不被调用方修改）
+        self._tools_result = _TOOLS_RESULT
+        self._notifications_result = _NOTIFICATIONS_RESULT
+        self._resources_result = _RESOURCES_RESULT
+        self._static_result_json = _STATIC_RESULT_JSON
         
         logger.info(f"增强版MCP服务器初始化完成 - Agent ID: {self.agent_id}")
     
-    def _define_tools(self) -> List[Dict[str, Any]]:
-        """定义可用工具"""
-        return [
-            {
-                "name": "sql_query",
-                "description": "执行SQL查询语句，返回查询结果。支持SELECT语句，可以查询数据、统计信息等。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "SQL查询语句，如：SELECT * FROM users WHERE age > 18"},
-                        "params": {"type": "array", "items": {"type": "string"}, "description": "查询参数列表"},
-                        "consistency_level": {
-                            "type": "string", 
-                            "description": "一致性级别 (read_uncommitted, read_committed, serializable)",
-                            "default": "read_committed"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "sql_update",
-                "description": "执行SQL更新语句，包括INSERT、UPDATE、DELETE操作。用于添加、修改、删除数据。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "SQL更新语句，如：INSERT INTO users (name, age) VALUES (?, ?)"},
-                        "params": {"type": "array", "items": {"type": "string"}, "description": "更新参数列表"},
-                        "use_optimistic_lock": {
-                            "type": "boolean", 
-                            "description": "是否使用乐观锁",
-                            "default": False
-                        },
-                        "version_column": {
-                            "type": "string", 
-                            "description": "版本列名（乐观锁使用）"
-                        },
-                        "version_value": {
-                            "type": "integer", 
-                            "description": "期望的版本值（乐观锁使用）"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "sql_transaction",
-                "description": "执行事务操作，支持多个SQL语句的原子性执行。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "operations": {
-                            "type": "array", 
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "query": {"type": "string"},
-                                    "params": {"type": "array", "items": {"type": "string"}}
-                                },
-                                "required": ["query"]
-                            },
-                            "description": "操作列表"
-                        },
-                        "isolation_level": {
-                            "type": "string", 
-                            "description": "隔离级别 (read_uncommitted, read_committed, serializable)",
-                            "default": "serializable"
-                        }
-                    },
-                    "required": ["operations"]
-                }
-            },
-            {
-                "name": "natural_language_query",
-                "description": "使用自然语言进行数据库操作，支持中文和英文。可以创建表、插入数据、查询数据、更新数据、删除数据等。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string", 
-                            "description": "自然语言查询，例如：'创建表 用户 包含 姓名:文本,年龄:数字,邮箱:文本' 或 '插入 姓名=张三,年龄=25 到 用户'"
-                        },
-                        "agent_id": {
-                            "type": "string", 
-                            "description": "代理ID，用于并发控制",
-                            "default": "nl_agent"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "list_tables",
-                "description": "列出数据库中的所有表。用于了解数据库结构。",
-                "inputSchema": {
-                    "type": "object", 
-                    "properties": {
-                        "consistency_level": {
-                            "type": "string", 
-                            "description": "一致性级别",
-                            "default": "read_committed"
-                        }
-                    }
-                }
-            },
-            {
-                "name": "describe_table",
-                "description": "描述指定表的结构，包括列名、数据类型、约束等信息。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "table_name": {"type": "string", "description": "表名"},
-                        "consistency_level": {
-                            "type": "string", 
-                            "description": "一致性级别",
-                            "default": "read_committed"
-                        }
-                    },
-                    "required": ["table_name"]
-                }
-            },
-            {
-                "name": "create_table",
-                "description": "创建新表。可以定义表结构、列类型、约束等。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "table_name": {"type": "string", "description": "表名"},
-                        "columns": {"type": "string", "description": "列定义SQL语句，如：id INTEGER PRIMARY KEY, name TEXT NOT NULL"}
-                    },
-                    "required": ["table_name", "columns"]
-                }
-            },
-            {
-                "name": "database_info",
-                "description": "获取数据库基本信息，包括表数量、数据库大小等统计信息。",
-                "inputSchema": {
-                    "type": "object", 
-                    "properties": {
-                        "consistency_level": {
-                            "type": "string", 
-                            "description": "一致性级别",
-                            "default": "read_committed"
-                        }
-                    }
-                }
-            },
-            {
-                "name": "agent_status",
-                "description": "获取当前Agent的状态信息，包括Agent ID、会话ID等。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {}
-                }
-            },
-            {
-                "name": "check_database_status",
-                "description": "检查数据库状态，包括表结构、数据量等统计信息。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {}
-                }
-            },
-            {
-                "name": "initialize_time_slots",
-                "description": "初始化时段库存数据，生成未来7天的可用时段。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {}
-                }
-            },
-            {
-                "name": "repair_database",
-                "description": "修复数据库，检查并修复数据完整性问题。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {}
-                }
-            },
-            {
-                "name": "transaction_history",
-                "description": "获取事务历史记录，用于调试和监控。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "limit": {
-                            "type": "integer", 
-                            "description": "返回的记录数量限制",
-                            "default": 100
-                        }
-                    }
-                }
-            }
-        ]
-    
-    def _define_notifications(self) -> List[Dict[str, Any]]:
-        """定义通知"""
-        return [
-            {
-                "name": "database_changed",
-                "description": "数据库发生变化时的通知"
-            },
-            {
-                "name": "transaction_committed",
-                "description": "事务提交成功的通知"
-            },
-            {
-                "name": "agent_connected",
-                "description": "Agent连接成功的通知"
-            },
-            {
-                "name": "natural_language_query_executed",
-                "description": "自然语言查询执行完成的通知"
-            }
-        ]
-    
-    def _define_resources(self) -> List[Dict[str, Any]]:
-        """定义资源"""
-        return [
-            {
-                "uri": "sqlite:///restaurants",
-                "name": "restaurants",
-                "description": "餐厅信息",
-                "mimeType": "application/json"
-            },
-            {
-                "uri": "sqlite:///table_types",
-                "name": "table_types",
-                "description": "桌型信息",
-                "mimeType": "application/json"
-            },
-            {
-                "uri": "sqlite:///database_schema",
-                "name": "database_schema",
-                "description": "数据库结构信息",
-                "mimeType": "application/json"
-            }
-        ]
+    def _bind_db_methods(self):
+        """登记只读工具的固定语句，并一次性选定状态类工具的调用方法，避免每次请求都做hasattr探测"""
+        manager = self.db_manager
+        
+        # 启动时登记只读工具的固定语句
+        for name, query in _STATEMENTS.items():
+            manager.prepare(name, query)
+        
+        # 以下方法仅部分管理器提供，不支持时为None，由各工具走回退逻辑
+        self._db_check_status = getattr(manager, 'check_database_status', None)
+        self._db_init_time_slots = getattr(manager, 'initialize_time_slots', None)
     
     async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理MCP请求"""
+        # 结构不合法的请求在分发前直接拒绝
+        if not _is_valid_request(request):
+            return _invalid_request(request)
+        
+        method = request["method"]
+        req_id = request.get("id")
         try:
-            method = request.get("method")
-            
             # 检查初始化状态（通知不需要检查）
-            if method not in ["initialize", "notifications/initialized"] and not self.initialized:
+            if not self.initialized and method not in _PRE_INIT_METHODS:
                 return {
                     "jsonrpc": "2.0",
-                    "id": request.get("id"),
+                    "id": req_id,
                     "error": {"code": -32002, "message": "Server not initialized"}
                 }
             
-            if method == "initialize":
-                return await self._initialize(request)
-            elif method == "tools/list":
-                return await self._list_tools(request)
-            elif method == "tools/call":
-                return await self._call_tool(request)
-            elif method == "notifications/list":
-                return await self._list_notifications(request)
-            elif method == "notifications/initialized":
-                await self._handle_initialized_notification(request)
-                return None  # 通知不需要返回响应
-            elif method == "resources/list":
-                return await self._list_resources(request)
-            elif method == "resources/read":
-                return await self._read_resource(request)
-            elif method == "shutdown":
-                return await self._handle_shutdown(request)
-            else:
+            handler = self._method_handlers.get(method)
+            if handler is None:
                 return {
                     "jsonrpc": "2.0",
-                    "id": request.get("id"),
+                    "id": req_id,
                     "error": {"code": -32601, "message": f"Method not found: {method}"}
                 }
+            return await handler(request)
         except Exception as e:
             logger.error(f"处理请求失败: {e}")
             return {
                 "jsonrpc": "2.0",
-                "id": request.get("id"),
+                "id": req_id,
                 "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
             }
     
@@ -359,41 +593,27 @@ class EnhancedMCPServer:
         return {
             "jsonrpc": "2.0",
             "id": request.get("id"),
-            "result": {"tools": self.tools}
+            "result": copy.deepcopy(self._tools_result)
         }
     
+    def _static_response_line(self, request_id: Any, result_json: bytes) -> bytes:
+        """直接拼接list类方法响应的JSON字节，复用预先序列化的result"""
+        return b'{"jsonrpc":"2.0","id":' + _json_dumps(request_id) + b',"result":' + result_json + b'}'
+    
     async def _list_notifications(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """列出通知（MCP协议标准格式）"""
-        # 将通知转换为标准格式
-        notifications_list = []
-        for notification in self.notifications:
-            notifications_list.append({
-                "name": notification["name"],
-                "description": notification["description"]
-            })
-        
         return {
             "jsonrpc": "2.0",
             "id": request.get("id"),
-            "result": {"notifications": notifications_list}
+            "result": copy.deepcopy(self._notifications_result)
         }
     
     async def _list_resources(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """列出资源（MCP协议标准格式）"""
-        # 将资源转换为标准格式
-        resources_list = []
-        for resource in self.resources:
-            resources_list.append({
-                "uri": resource["uri"],
-                "name": resource["name"],
-                "description": resource["description"],
-                "mimeType": resource["mimeType"]
-            })
-        
         return {
             "jsonrpc": "2.0",
             "id": request.get("id"),
-            "result": {"resources": resources_list}
+            "result": copy.deepcopy(self._resources_result)
         }
     
     async def _handle_initialized_notification(self, request: Dict[str, Any]) -> Dict[str, Any]:
@@ -433,7 +653,7 @@ class EnhancedMCPServer:
                     "contents": [{
                         "uri": uri,
                         "mimeType": "application/json",
-                        "text": json.dumps(content, ensure_ascii=False, indent=2)
+                        "text": _json_pretty(content)
                     }]
                 }
             }
@@ -451,35 +671,24 @@ class EnhancedMCPServer:
         arguments = params.get("arguments", {})
         
         try:
-            # 支持 query_database 作为 sql_query 的别名
-            if tool_name in ("sql_query", "query_database"):
-                result = await self._execute_query(arguments)
-            elif tool_name == "sql_update":
-                result = await self._execute_update(arguments)
-            elif tool_name == "sql_transaction":
-                result = await self._execute_transaction(arguments)
-            elif tool_name == "natural_language_query":
-                result = await self._execute_natural_language_query(arguments)
-            elif tool_name == "list_tables":
-                result = await self._list_tables(arguments)
-            elif tool_name == "describe_table":
-                result = await self._describe_table(arguments)
-            elif tool_name == "create_table":
-                result = await self._create_table(arguments)
-            elif tool_name == "database_info":
-                result = await self._database_info(arguments)
-            elif tool_name == "agent_status":
-                result = await self._agent_status(arguments)
-            elif tool_name == "check_database_status":
-                result = await self._check_database_status(arguments)
-            elif tool_name == "initialize_time_slots":
-                result = await self._initialize_time_slots(arguments)
-            elif tool_name == "repair_database":
-                result = await self._repair_database(arguments)
-            elif tool_name == "transaction_history":
-                result = await self._transaction_history(arguments)
-            else:
+            handler = self._tool_handlers.get(tool_name)
+            if handler is None:
                 raise ValueError(f"未知工具: {tool_name}")
+            if not isinstance(arguments, dict):
+                raise ValueError("arguments必须是对象")
+            missing = [name for name in self._tool_required.get(tool_name, ()) if name not in arguments]
+            if missing:
+                raise ValueError(f"缺少必需参数: {', '.join(missing)}")
+            try:
+                if tool_name in _COALESCED_TOOLS:
+                    result = await self._singleflight((tool_name, _json_dumps(arguments)), handler, arguments)
+                else:
+                    result = await handler(arguments)
+            finally:
+                if tool_name in _WRITE_TOOLS:
+                    self._meta_cache.clear()
+                    # 写入完成后到达的读请求不再搭乘写入前发起的调用
+                    self._inflight.clear()
             
             return {
                 "jsonrpc": "2.0",
@@ -496,91 +705,142 @@ class EnhancedMCPServer:
                 }
             }
     
+    async def _singleflight(self, key: tuple, handler, arguments: Dict[str, Any]) -> str:
+        """
+        合并并发的相同调用：同一key已有调用在执行时直接等待其结果，否则由本次调用执行并广播结果
+        
+        Args:
+            key: 调用标识
+            handler: 工具处理方法
+            arguments: 工具参数
+            
+        Returns:
+            工具结果文本
+        """
+        fut = self._inflight.get(key)
+        if fut is not None:
+            # shield: 跟随者被取消时不影响共享的Future
+            return await asyncio.shield(fut)
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await handler(arguments)
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # 标记异常已取出，无跟随者时不产生 "exception was never retrieved" 警告
+            raise
+        except BaseException:
+            fut.cancel()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+    
     # 工具实现方法
     async def _execute_query(self, arguments: Dict[str, Any]) -> str:
         """执行查询"""
         query = arguments.get("query", "")
-        params = tuple(arguments.get("params", []))
-        consistency_level = arguments.get("consistency_level", "read_committed")
-        
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_query_with_consistency'):
-            results = self.db_manager.execute_query_with_consistency(query, params, consistency_level)
-        else:
-            results = self.db_manager.execute_query(query, params)
+        # sqlite3接受任意序列作为参数，直接使用解析出的列表，不再复制为元组
+        params = arguments.get("params") or ()
+        max_rows = arguments.get("max_rows")
+        if max_rows is not None and (isinstance(max_rows, bool) or not isinstance(max_rows, int) or max_rows < 1):
+            raise ValueError(f"max_rows必须是正整数: {max_rows!r}")
         
-        return f"查询成功，返回 {len(results)} 行结果:\n{json.dumps(results, ensure_ascii=False, indent=2)}"
+        results = await self._query_db(query, params, max_rows)
+        # 结果直接输出为紧凑JSON数组，便于客户端解析
+        return _json_dumps(results).decode()
     
     async def _execute_update(self, arguments: Dict[str, Any]) -> str:
         """执行更新"""
         query = arguments.get("query", "")
-        params = tuple(arguments.get("params", []))
-        use_optimistic_lock = arguments.get("use_optimistic_lock", False)
-        version_column = arguments.get("version_column")
-        version_value = arguments.get("version_value")
-        
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_update_with_optimistic_lock'):
-            if use_optimistic_lock and version_column and version_value is not None:
-                affected_rows = self.db_manager.execute_update_with_optimistic_lock(
-                    query, params, version_column, version_value
-                )
-            else:
-                affected_rows = self.db_manager.execute_update(query, params)
-        else:
-            affected_rows = self.db_manager.execute_update(query, params)
+        params = arguments.get("params") or ()
+        
+        affected_rows = await self._run_db(self.db_manager.execute_update, query, params)
         
         return f"更新成功，影响 {affected_rows} 行"
     
     async def _execute_transaction(self, arguments: Dict[str, Any]) -> str:
         """执行事务"""
         operations = arguments.get("operations", [])
-        isolation_level = arguments.get("isolation_level", "serializable")
         
         # 转换操作格式
-        formatted_operations = []
-        for op in operations:
-            query = op.get("query", "")
-            params = tuple(op.get("params", []))
-            formatted_operations.append((query, params))
-        
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_transaction_with_isolation'):
-            success = self.db_manager.execute_transaction_with_isolation(formatted_operations, isolation_level)
-        else:
-            # 回退到普通事务
-            success = self.db_manager.execute_transaction(formatted_operations)
+        formatted_operations = [(op.get("query", ""), op.get("params") or ()) for op in operations]
+        
+        success = await self._run_db(self.db_manager.execute_transaction, formatted_operations)
         
         return f"事务执行{'成功' if success else '失败'}"
     
-    async def _list_tables(self, arguments: Dict[str, Any]) -> str:
-        """列出所有表"""
-        consistency_level = arguments.get("consistency_level", "read_committed")
-        query = """
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name NOT LIKE 'sqlite_%'
-            ORDER BY name
+    async def _cached_query(self, name: str, params: tuple = (), as_tuples: bool = False) -> list:
         """
+        执行元数据查询（命名语句），短时间内的相同查询直接复用结果
         
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_query_with_consistency'):
-            results = self.db_manager.execute_query_with_consistency(query, (), consistency_level)
-        else:
-            results = self.db_manager.execute_query(query)
+        Args:
+            name: 语句名称
+            params: 查询参数
+            as_tuples: 为True时每行返回元组而非dict
+            
+        Returns:
+            查询结果
+        """
+        key = (name, params, as_tuples)
+        now = time.monotonic()
+        cached = self._meta_cache.get(key)
+        if cached is not None and now - cached[0] < _META_CACHE_TTL:
+            return cached[1]
         
-        table_names = [row['name'] for row in results]
-        return f"数据库中的表:\n{json.dumps(table_names, ensure_ascii=False, indent=2)}"
+        results = await self._query_prepared(name, params, as_tuples)
+        self._meta_cache[key] = (now, results)
+        return results
+    
+    async def _query_db(self, query: str, params: tuple = (), max_rows: Optional[int] = None) -> List[Dict]:
+        """执行查询"""
+        return await self._run_db(self.db_manager.execute_query, query, params, max_rows)
+    
+    async def _query_prepared(self, name: str, params: tuple = (), as_tuples: bool = False) -> list:
+        """执行启动时登记的命名语句"""
+        return await self._run_db(self.db_manager.execute_prepared, name, params, None, as_tuples)
+    
+    async def _run_db(self, fn, *args):
+        """
+        在数据库线程池中执行同步数据库调用
+        
+        Args:
+            fn: 数据库管理器的同步方法
+            *args: 调用参数
+            
+        Returns:
+            fn的返回值
+        """
+        async with self._db_sem:
+            return await asyncio.get_running_loop().run_in_executor(self._db_executor, fn, *args)
+    
+    async def _list_tables(self, arguments: Dict[str, Any]) -> str:
+        """列出所有表"""
+        # 单列查询按位置取值，不逐行构造dict
+        results = await self._cached_query("list_tables", (), as_tuples=True)
+        table_names = [row[0] for row in results]
+        return f"数据库中的表:\n{_json_pretty(table_names)}"
     
     async def _describe_table(self, arguments: Dict[str, Any]) -> str:
         """描述表结构"""
         table_name = arguments.get("table_name", "")
-        consistency_level = arguments.get("consistency_level", "read_committed")
+        _check_table_name(table_name)
         
-        schema_query = f"PRAGMA table_info({table_name})"
-        info_query = f"SELECT sql FROM sqlite_master WHERE type='table' AND name=?"
+        # schema_version在任何连接（包括其他进程）执行DDL后都会递增，未变化时直接复用上次的结果
+        schema_version = (await self._query_prepared("schema_version", ()))[0]['schema_version']
+        cached = self._describe_cache.get(table_name)
+        if cached is not None and cached[0] == schema_version:
+            return cached[1]
         
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_query_with_consistency'):
-            schema_results = self.db_manager.execute_query_with_consistency(schema_query, (), consistency_level)
-            info_results = self.db_manager.execute_query_with_consistency(info_query, (table_name,), consistency_level)
-        else:
-            schema_results = self.db_manager.execute_query(schema_query)
-            info_results = self.db_manager.execute_query(info_query, (table_name,))
+        # 两个查询互不依赖，在数据库线程池中并发执行
+        schema_results, info_results = await asyncio.gather(
+            self._query_prepared("table_info", (table_name,)),
+            self._query_prepared("create_statement", (table_name,))
+        )
         
         description = {
             "table_name": table_name,
@@ -588,43 +848,28 @@ class EnhancedMCPServer:
             "create_statement": info_results[0]['sql'] if info_results else None
         }
         
-        return f"表 '{table_name}' 的结构:\n{json.dumps(description, ensure_ascii=False, indent=2)}"
+        result = f"表 '{table_name}' 的结构:\n{_json_pretty(description)}"
+        self._describe_cache[table_name] = (schema_version, result)
+        return result
     
     async def _create_table(self, arguments: Dict[str, Any]) -> str:
         """创建表"""
         table_name = arguments.get("table_name", "")
         columns = arguments.get("columns", "")
+        _check_table_name(table_name)
         
         create_query = f"CREATE TABLE {table_name} ({columns})"
-        self.db_manager.execute_update(create_query)
+        await self._run_db(self.db_manager.execute_update, create_query)
         return f"表 '{table_name}' 创建成功"
     
     async def _database_info(self, arguments: Dict[str, Any]) -> str:
         """获取数据库信息"""
-        consistency_level = arguments.get("consistency_level", "read_committed")
-        
-        tables_query = """
-            SELECT COUNT(*) as table_count FROM sqlite_master 
-            WHERE type='table' AND name NOT LIKE 'sqlite_%'
-        """
-        size_query = "SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size()"
-        tables_list_query = """
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name NOT LIKE 'sqlite_%'
-            ORDER BY name
-        """
-        
-        if self.use_thread_safe and hasattr(self.db_manager, 'execute_query_with_consistency'):
-            table_count = self.db_manager.execute_query_with_consistency(tables_query, (), consistency_level)[0]['table_count']
-            size_result = self.db_manager.execute_query_with_consistency(size_query, (), consistency_level)
-            tables = self.db_manager.execute_query_with_consistency(tables_list_query, (), consistency_level)
-        else:
-            table_count = self.db_manager.execute_query(tables_query)[0]['table_count']
-            size_result = self.db_manager.execute_query(size_query)
-            tables = self.db_manager.execute_query(tables_list_query)
+        # 每行为 (size, name) 元组
+        rows = await self._cached_query("database_info", (), as_tuples=True)
         
-        db_size = size_result[0]['size'] if size_result else 0
-        table_names = [row['name'] for row in tables]
+        db_size = rows[0][0] if rows else 0
+        table_names = [row[1] for row in rows if row[1] is not None]
+        table_count = len(table_names)
         
         info = {
             "database_path": settings.database_path,
@@ -635,21 +880,11 @@ class EnhancedMCPServer:
             "tables": table_names
         }
         
-        return f"数据库信息:\n{json.dumps(info, ensure_ascii=False, indent=2)}"
+        return f"数据库信息:\n{_json_pretty(info)}"
     
     async def _agent_status(self, arguments: Dict[str, Any]) -> str:
         """获取Agent状态"""
-        if self.use_thread_safe and hasattr(self.db_manager, 'get_agent_status'):
-            status = self.db_manager.get_agent_status()
-        else:
-            status = {
-                "agent_id": self.agent_id,
-                "use_thread_safe": self.use_thread_safe,
-                "database_path": settings.database_path,
-                "timestamp": time.time()
-            }
-        
-        return f"Agent状态:\n{json.dumps(status, ensure_ascii=False, indent=2)}"
+        return f"{self._agent_status_prefix}{time.time()}\n}}"
     
     async def _execute_natural_language_query(self, arguments: Dict[str, Any]) -> str:
         """执行自然语言查询"""
@@ -660,8 +895,8 @@ class EnhancedMCPServer:
             return "错误: 自然语言查询不能为空"
         
         try:
-            # 使用自然语言处理器
-            result = natural_language_query(query, self.db_manager, agent_id)
+            # 使用自然语言处理器（解析结果按问法缓存，SQL在数据库线程池中执行）
+            result = await self._run_db(natural_language_query, query, self.db_manager, agent_id)
             
             if result.get('success'):
                 operation = result.get('operation', 'unknown')
@@ -673,7 +908,7 @@ class EnhancedMCPServer:
                 if sql:
                     response += f"📝 生成的SQL: {sql}\n"
                 if db_result:
-                    response += f"📊 数据库结果: {json.dumps(db_result, ensure_ascii=False, indent=2)}"
+                    response += f"📊 数据库结果: {_json_pretty(db_result)}"
                 
                 return response
             else:
@@ -692,109 +927,119 @@ class EnhancedMCPServer:
     
     async def _transaction_history(self, arguments: Dict[str, Any]) -> str:
         """获取事务历史"""
-        limit = arguments.get("limit", 100)
-        
-        if self.use_thread_safe and hasattr(self.db_manager, 'get_transaction_history'):
-            history = self.db_manager.get_transaction_history(limit)
-        else:
-            history = []
-        
-        return f"事务历史 (最近 {len(history)} 条):\n{json.dumps(history, ensure_ascii=False, indent=2)}"
+        # 服务器使用的数据库管理器均不记录事务日志
+        return f"事务历史 (最近 0 条):\n{_json_pretty([])}"
     
     async def _check_database_status(self, arguments: Dict[str, Any]) -> str:
         """检查数据库状态"""
         try:
-            if hasattr(self.db_manager, 'check_database_status'):
-                status = self.db_manager.check_database_status()
-            else:
-                # 回退到基本状态检查
-                status = {
-                    "database_path": settings.database_path,
-                    "agent_id": self.agent_id,
-                    "use_thread_safe": self.use_thread_safe,
-                    "tables": {},
-                    "data_counts": {}
-                }
-                
-                # 检查表
-                tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-                tables = self.db_manager.execute_query(tables_query)
-                
-                for table in tables:
-                    table_name = table['name']
-                    status["tables"][table_name] = "exists"
-                    
-                    # 检查数据量
-                    count_query = f"SELECT COUNT(*) as count FROM {table_name}"
-                    count_result = self.db_manager.execute_query(count_query)
-                    status["data_counts"][table_name] = count_result[0]['count']
+            status = await self._run_db(self._db_check_status or self._basic_database_status)
             
-            return f"数据库状态:\n{json.dumps(status, ensure_ascii=False, indent=2)}"
+            return f"数据库状态:\n{_json_pretty(status)}"
             
         except Exception as e:
             logger.error(f"数据库状态检查失败: {e}")
             return f"❌ 数据库状态检查失败: {str(e)}"
     
+    def _basic_database_status(self) -> Dict[str, Any]:
+        """
+        基本状态检查（数据库管理器未提供check_database_status时使用，在数据库线程池中执行）
+        
+        Returns:
+            Dict: 数据库路径、表及各表数据量
+        """
+        status = {
+            "database_path": settings.database_path,
+            "agent_id": self.agent_id,
+            "use_thread_safe": self.use_thread_safe,
+            "tables": {},
+            "data_counts": {}
+        }
+        
+        # 检查表
+        tables_query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        tables = self.db_manager.execute_query(tables_query)
+        
+        for table in tables:
+            table_name = table['name']
+            status["tables"][table_name] = "exists"
+            
+            # 检查数据量
+            count_query = f"SELECT COUNT(*) as count FROM {table_name}"
+            count_result = self.db_manager.execute_query(count_query)
+            status["data_counts"][table_name] = count_result[0]['count']
+        
+        return status
+    
     async def _initialize_time_slots(self, arguments: Dict[str, Any]) -> str:
         """初始化时段库存数据"""
         try:
-            if hasattr(self.db_manager, 'initialize_time_slots'):
-                success = self.db_manager.initialize_time_slots()
+            if self._db_init_time_slots is not None:
+                success = await self._run_db(self._db_init_time_slots)
                 if success:
                     return "✅ 时段库存初始化成功"
                 else:
                     return "❌ 时段库存初始化失败"
             else:
                 # 回退到手动初始化
-                logger.info("使用手动方式初始化时段库存")
-                
-                # 检查基础数据
-                restaurant_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM restaurants")[0]['count']
-                table_type_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM table_types")[0]['count']
-                
-                if restaurant_count == 0 or table_type_count == 0:
-                    return "❌ 基础数据缺失，无法初始化时段库存"
-                
-                # 使用事务初始化时段库存
-                operations = [
-                    ("DELETE FROM time_slots WHERE slot_start >= datetime('now', 'start of day')", ()),
-                    ("""
-                    INSERT INTO time_slots (restaurant_id, table_type_id, slot_start, slot_end, available, total)
-                    SELECT 
-                        r.id,
-                        tt.id,
-                        datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours') as slot_start,
-                        datetime('now', '+' || (days.day) || ' days', 'start of day', '+14 hours') as slot_end,
-                        tt.quantity as available,
-                        tt.quantity as total
-                    FROM restaurants r
-                    JOIN table_types tt ON r.id = tt.restaurant_id
-                    CROSS JOIN (
-                        SELECT 0 as day UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 
-                        UNION SELECT 4 UNION SELECT 5 UNION SELECT 6
-                    ) days
-                    WHERE r.name IN ('广式早茶', '川菜馆', '日料店', '西餐厅')
-                    AND NOT EXISTS (
-                        SELECT 1 FROM time_slots ts 
-                        WHERE ts.restaurant_id = r.id 
-                        AND ts.table_type_id = tt.id 
-                        AND ts.slot_start = datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours')
-                    )
-                    """, ())
-                ]
-                
-                success = self.db_manager.execute_transaction(operations)
-                
-                if success:
-                    time_slots_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM time_slots")[0]['count']
-                    return f"✅ 时段库存初始化成功，共生成 {time_slots_count} 条记录"
-                else:
-                    return "❌ 时段库存初始化失败"
+                return await self._run_db(self._initialize_time_slots_manually)
                 
         except Exception as e:
             logger.error(f"时段库存初始化失败: {e}")
             return f"❌ 时段库存初始化失败: {str(e)}"
     
+    def _initialize_time_slots_manually(self) -> str:
+        """
+        手动初始化时段库存（数据库管理器未提供initialize_time_slots时使用，在数据库线程池中执行）
+        
+        Returns:
+            str: 初始化结果说明
+        """
+        logger.info("使用手动方式初始化时段库存")
+        
+        # 检查基础数据
+        restaurant_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM restaurants")[0]['count']
+        table_type_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM table_types")[0]['count']
+        
+        if restaurant_count == 0 or table_type_count == 0:
+            return "❌ 基础数据缺失，无法初始化时段库存"
+        
+        # 使用事务初始化时段库存
+        operations = [
+            ("DELETE FROM time_slots WHERE slot_start >= datetime('now', 'start of day')", ()),
+            ("""
+            INSERT INTO time_slots (restaurant_id, table_type_id, slot_start, slot_end, available, total)
+            SELECT 
+                r.id,
+                tt.id,
+                datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours') as slot_start,
+                datetime('now', '+' || (days.day) || ' days', 'start of day', '+14 hours') as slot_end,
+                tt.quantity as available,
+                tt.quantity as total
+            FROM restaurants r
+            JOIN table_types tt ON r.id = tt.restaurant_id
+            CROSS JOIN (
+                SELECT 0 as day UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 
+                UNION SELECT 4 UNION SELECT 5 UNION SELECT 6
+            ) days
+            WHERE r.name IN ('广式早茶', '川菜馆', '日料店', '西餐厅')
+            AND NOT EXISTS (
+                SELECT 1 FROM time_slots ts 
+                WHERE ts.restaurant_id = r.id 
+                AND ts.table_type_id = tt.id 
+                AND ts.slot_start = datetime('now', '+' || (days.day) || ' days', 'start of day', '+12 hours')
+            )
+            """, ())
+        ]
+        
+        success = self.db_manager.execute_transaction(operations)
+        
+        if success:
+            time_slots_count = self.db_manager.execute_query("SELECT COUNT(*) as count FROM time_slots")[0]['count']
+            return f"✅ 时段库存初始化成功，共生成 {time_slots_count} 条记录"
+        else:
+            return "❌ 时段库存初始化失败"
+    
     async def _repair_database(self, arguments: Dict[str, Any]) -> str:
         """修复数据库"""
         try:
@@ -804,7 +1049,7 @@ class EnhancedMCPServer:
             status = await self._check_database_status({})
             
             # 检查外键约束
-            fk_check = self.db_manager.execute_query("PRAGMA foreign_key_check")
+            fk_check = await self._run_db(self.db_manager.execute_query, "PRAGMA foreign_key_check")
             if fk_check:
                 logger.warning(f"发现外键约束问题: {fk_check}")
             
@@ -814,10 +1059,8 @@ class EnhancedMCPServer:
                 with open(restaurant_init_path, 'r', encoding='utf-8') as f:
                     init_sql = f.read()
                 
-                statements = [stmt.strip() for stmt in init_sql.split(';') if stmt.strip()]
-                for stmt in statements:
-                    if stmt:
-                        self.db_manager.execute_update(stmt)
+                # 整个脚本交由SQLite在单个事务中执行，避免按分号切分出错
+                await self._run_db(self.db_manager.execute_script, init_sql)
                 
                 logger.info("餐厅系统数据修复完成")
                 return "✅ 数据库修复完成"
@@ -833,7 +1076,7 @@ class EnhancedMCPServer:
     async def _get_restaurants_data(self) -> List[Dict[str, Any]]:
         """获取餐厅数据"""
         query = "SELECT * FROM restaurants ORDER BY id"
-        return self.db_manager.execute_query(query)
+        return await self._run_db(self.db_manager.execute_query, query)
     
     async def _get_table_types_data(self) -> List[Dict[str, Any]]:
         """获取桌型数据"""
@@ -843,48 +1086,153 @@ class EnhancedMCPServer:
             JOIN restaurants r ON tt.restaurant_id = r.id
             ORDER BY r.name, tt.capacity
         """
-        return self.db_manager.execute_query(query)
+        return await self._run_db(self.db_manager.execute_query, query)
     
     async def _get_database_schema_data(self) -> Dict[str, Any]:
         """获取数据库结构数据"""
-        tables_query = """
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name NOT LIKE 'sqlite_%'
-            ORDER BY name
-        """
-        tables = self.db_manager.execute_query(tables_query)
+        # 与describe_table相同，schema_version未变化时直接复用上次的结构数据
+        schema_version = (await self._query_prepared("schema_version", ()))[0]['schema_version']
+        cached = self._schema_cache
+        if cached is not None and cached[0] == schema_version:
+            return cached[1]
         
-        schema = {}
-        for table in tables:
-            table_name = table['name']
-            schema_query = f"PRAGMA table_info({table_name})"
-            columns = self.db_manager.execute_query(schema_query)
-            schema[table_name] = columns
+        # 一次查询取得所有表的列信息，代替逐表执行 PRAGMA table_info
+        rows = await self._query_prepared("schema_columns", ())
+        schema: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            schema.setdefault(row.pop('table_name'), []).append(row)
         
-        return {
+        data = {
             "database_path": settings.database_path,
             "tables": schema,
-            "total_tables": len(tables)
+            "total_tables": len(schema)
         }
+        self._schema_cache = (schema_version, data)
+        return data
+    
+    async def _connect_stdin(self, loop: asyncio.AbstractEventLoop) -> Optional[asyncio.StreamReader]:
+        """
+        将标准输入接入事件循环，按行异步读取请求，避免每行都提交到线程池
+        
+        Args:
+            loop: 当前事件循环
+            
+        Returns:
+            StreamReader；标准输入不是管道或套接字（如终端，非阻塞模式会影响共用该终端的日志写入）时返回None
+        """
+        reader = asyncio.StreamReader(limit=_STDIN_LINE_LIMIT)
+        try:
+            mode = os.fstat(sys.stdin.fileno()).st_mode
+            if not (stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)):
+                return None
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (ValueError, OSError, NotImplementedError) as e:
+            logger.info(f"标准输入不支持异步管道读取，改用线程池逐行读取: {e}")
+            return None
+        return reader
+    
+    async def _connect_stdout(self, loop: asyncio.AbstractEventLoop) -> Optional[asyncio.StreamWriter]:
+        """
+        将标准输出接入事件循环，写满管道缓冲时挂起当前协程而不是阻塞整个事件循环
+        
+        Args:
+            loop: 当前事件循环
+            
+        Returns:
+            StreamWriter；标准输出不是管道，或与标准错误共用同一文件（非阻塞模式会影响日志写入）时返回None
+        """
+        try:
+            if os.path.sameopenfile(sys.stdout.fileno(), sys.stderr.fileno()):
+                return None
+            sys.stdout.flush()
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        except (ValueError, OSError, NotImplementedError) as e:
+            logger.info(f"标准输出不支持异步管道写入，改用同步写入: {e}")
+            return None
+        # 缓冲区高水位设为0：数据未完全写入管道时drain即等待，退出前不会遗留未写出的响应
+        transport.set_write_buffer_limits(high=0)
+        return asyncio.StreamWriter(transport, protocol, None, loop)
     
     async def run(self):
         """运行服务器 - 标准stdio模式"""
         logger.info(f"启动增强版MCP服务器 (stdio模式) - Agent ID: {self.agent_id}")
         
+        loop = asyncio.get_running_loop()
+        reader = await self._connect_stdin(loop)
+        writer = await self._connect_stdout(loop)
+        
+        async def send(data: bytes) -> None:
+            """输出一条响应"""
+            if writer is None:
+                _write_line(data)
+                return
+            writer.write(data + b"\n")
+            await writer.drain()
+        
+        # 响应统一放入输出队列，由单个写出任务按完成顺序依次输出（客户端按id匹配响应，无需保持请求顺序）
+        out_queue: asyncio.Queue = asyncio.Queue()
+        
+        async def write_responses() -> None:
+            """写出任务：逐条输出队列中的响应，收到None时结束"""
+            while True:
+                data = await out_queue.get()
+                if data is None:
+                    return
+                await send(data)
+        
+        writer_task = asyncio.create_task(write_responses())
+        # 执行中的请求任务，退出前等待全部完成
+        pending = set()
+        
         while True:
             try:
                 # 从标准输入读取请求
-                line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
+                if reader is not None:
+                    line = await reader.readline()
+                else:
+                    line = await loop.run_in_executor(None, sys.stdin.readline)
                 if not line:
                     break
                 
-                request = json.loads(line.strip())
-                response = await self.handle_request(request)
+                try:
+                    request = _json_loads(line.strip())
+                except ValueError as e:
+                    logger.error(f"请求JSON解析失败: {e}")
+                    out_queue.put_nowait(_PARSE_ERROR_LINE)
+                    continue
+                
+                if not _is_valid_request(request):
+                    out_queue.put_nowait(_json_dumps(_invalid_request(request)))
+                    continue
                 
-                # 只有当响应不为None时才输出（通知不需要响应）
-                if response is not None:
-                    print(json.dumps(response, ensure_ascii=False))
-                    sys.stdout.flush()
+                method = request["method"]
+                if self.initialized:
+                    # 工具/通知/资源列表快速路径：跳过对整个列表的重复序列化
+                    result_json = self._static_result_json.get(method)
+                    if result_json is not None:
+                        out_queue.put_nowait(self._static_response_line(request.get("id"), result_json))
+                        continue
+                    # 未知方法直接输出错误响应，不经过handle_request构造dict再序列化
+                    if method not in self._method_handlers:
+                        out_queue.put_nowait(_method_not_found_line(request.get("id"), method))
+                        continue
+                
+                if method in _PRE_INIT_METHODS:
+                    # 初始化相关请求就地处理，保证之后读到的请求都能看到初始化完成的状态
+                    await self._process_request(request, out_queue)
+                    continue
+                
+                if _is_write_call(request):
+                    # 写工具作为屏障：先等待已发起的请求完成，再就地执行，之后的请求等写入结束后才开始
+                    if pending:
+                        await asyncio.gather(*pending)
+                    await self._process_request(request, out_queue)
+                    continue
+                
+                # 连续的只读请求作为独立任务并发执行，慢查询不再阻塞后续请求
+                task = asyncio.create_task(self._process_request(request, out_queue))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
                 
             except KeyboardInterrupt:
                 logger.info("服务器被用户中断")
@@ -896,9 +1244,35 @@ class EnhancedMCPServer:
                     "id": None,
                     "error": {"code": -32700, "message": f"Parse error: {str(e)}"}
                 }
-                print(json.dumps(error_response, ensure_ascii=False))
-                sys.stdout.flush()
-
+                out_queue.put_nowait(_json_dumps(error_response))
+        
+        # 输入结束：等待执行中的请求完成并写出全部响应
+        if pending:
+            await asyncio.gather(*pending)
+        out_queue.put_nowait(None)
+        await writer_task
+    
+    async def _process_request(self, request: Dict[str, Any], out_queue: asyncio.Queue) -> None:
+        """
+        处理一条请求，并将响应的JSON字节放入输出队列
+        
+        Args:
+            request: 已校验的JSON-RPC请求
+            out_queue: 输出队列
+        """
+        try:
+            response = await self.handle_request(request)
+        except Exception as e:
+            logger.error(f"处理请求时出错: {e}")
+            response = {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
+            }
+        
+        # 只有当响应不为None时才输出（通知不需要响应）
+        if response is not None:
+            out_queue.put_nowait(_json_dumps(response))
 
 def create_enhanced_server(agent_id: Optional[str] = None, use_thread_safe: bool = False) -> EnhancedMCPServer:
     """创建增强版MCP服务器实例"""
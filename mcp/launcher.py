@@ -0,0 +1,104 @@
+"""
+MCP服务器启动器 - 各运行模式共用的启动逻辑
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+from typing import List, Optional
+
+from config.logging_setup import configure
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 运行模式 -> (服务器模块, 工厂函数, 是否传入Agent参数, 是否网络模式)
+MODES = {
+    "stdio": ("mcp.simple_server", "create_simple_server", False, False),
+    "enhanced": ("mcp.enhanced_server", "create_enhanced_server", True, False),
+    "natural": ("mcp.natural_language_server", "create_natural_language_server", False, False),
+    "network": ("mcp.network_server", "create_network_server", True, True),
+    "simple": ("mcp.enhanced_server", "create_enhanced_server", False, False),
+    "standard": ("mcp.standard_server", "create_standard_server", False, False),
+    "standard_network": ("mcp.standard_network_server", "create_standard_network_server", True, True),
+}
+
+
+async def serve(mode: str) -> None:
+    """
+    按运行模式创建并运行MCP服务器（只导入所选模式对应的服务器模块）
+    
+    Args:
+        mode: 运行模式，取值见 MODES
+    """
+    module_name, factory_name, with_agent, is_network = MODES[mode]
+    try:
+        logger.info(f"启动SQLite MCP服务器 (模式: {mode})...")
+        logger.info(f"服务器名称: {settings.mcp_server_name}")
+        logger.info(f"服务器版本: {settings.mcp_server_version}")
+        logger.info(f"数据库路径: {settings.database_path}")
+        
+        if settings.init_script:
+            logger.info(f"初始化脚本: {settings.init_script}")
+        
+        factory = getattr(importlib.import_module(module_name), factory_name)
+        
+        if with_agent:
+            logger.info(f"Agent ID: {settings.agent_id or '自动生成'}")
+            logger.info(f"线程安全模式: {settings.use_thread_safe}")
+            server = factory(settings.agent_id, settings.use_thread_safe)
+        else:
+            server = factory()
+        
+        if is_network:
+            logger.info(f"监听地址: {settings.mcp_host}:{settings.mcp_port}")
+            await server.run(settings.mcp_host, settings.mcp_port)
+        else:
+            await server.run()
+        
+    except KeyboardInterrupt:
+        logger.info("服务器被用户中断")
+    except Exception as e:
+        logger.error(f"服务器运行错误: {e}")
+        sys.exit(1)
+
+
+def install_uvloop() -> bool:
+    """
+    可用时将uvloop设为事件循环实现（uvicorn[standard]在非Windows平台会一并安装）
+    
+    Returns:
+        是否已启用uvloop
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
+
+
+def run(mode: str) -> None:
+    """
+    配置日志并以指定模式运行服务器
+    
+    Args:
+        mode: 运行模式，取值见 MODES
+    """
+    configure(settings.log_level)
+    install_uvloop()
+    asyncio.run(serve(mode))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    命令行入口：python . --mode <模式>
+    
+    Args:
+        argv: 命令行参数，默认读取 sys.argv
+    """
+    parser = argparse.ArgumentParser(description="SQLite MCP服务器")
+    parser.add_argument("--mode", choices=sorted(MODES), default="enhanced", help="运行模式")
+    args = parser.parse_args(argv)
+    run(args.mode)
@@ -6,6 +6,7 @@
 import re
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 
@@ -122,6 +123,42 @@ class NaturalLanguageProcessor:
         Returns:
             处理结果字典
         """
+        return self.execute_plan(self.translate(query), agent_id)
+    
+    def execute_plan(self, plan: Dict[str, Any], agent_id: str = "nl_agent") -> Dict[str, Any]:
+        """
+        执行translate生成的SQL
+        
+        Args:
+            plan: translate的返回值（不会被修改）
+            agent_id: 代理ID
+            
+        Returns:
+            处理结果字典（解析失败时原样返回plan）
+        """
+        if not plan.get('success'):
+            return plan
+        
+        try:
+            result = self.db_adapter.execute_sql(plan['sql'], agent_id)
+        except Exception as e:
+            logger.error(f"处理自然语言查询时出错: {e}")
+            return {
+                'success': False,
+                'error': f'处理查询时出错: {str(e)}'
+            }
+        return {**plan, 'result': result}
+    
+    def translate(self, query: str) -> Dict[str, Any]:
+        """
+        将自然语言查询解析为SQL（不访问数据库，结果只取决于查询文本）
+        
+        Args:
+            query: 自然语言查询
+            
+        Returns:
+            解析结果字典：成功时包含operation、table_name、sql、message
+        """
         try:
             query = query.strip()
             
@@ -129,15 +166,15 @@ class NaturalLanguageProcessor:
             operation = self._detect_operation(query)
             
             if operation == 'create':
-                return self._handle_create_table(query, agent_id)
+                return self._plan_create_table(query)
             elif operation == 'insert':
-                return self._handle_insert(query, agent_id)
+                return self._plan_insert(query)
             elif operation == 'select':
-                return self._handle_select(query, agent_id)
+                return self._plan_select(query)
             elif operation == 'update':
-                return self._handle_update(query, agent_id)
+                return self._plan_update(query)
             elif operation == 'delete':
-                return self._handle_delete(query, agent_id)
+                return self._plan_delete(query)
             else:
                 return {
                     'success': False,
@@ -169,8 +206,8 @@ class NaturalLanguageProcessor:
         
         return None
     
-    def _handle_create_table(self, query: str, agent_id: str) -> Dict[str, Any]:
-        """处理创建表操作"""
+    def _plan_create_table(self, query: str) -> Dict[str, Any]:
+        """解析创建表命令并生成SQL（不执行）"""
         for pattern in self.table_patterns['create']:
             match = re.search(pattern, query, re.IGNORECASE)
             if match:
@@ -188,15 +225,11 @@ class NaturalLanguageProcessor:
                 # 生成SQL
                 sql = self._generate_create_sql(table_name, fields)
                 
-                # 执行SQL
-                result = self.db_adapter.execute_sql(sql, agent_id)
-                
                 return {
                     'success': True,
                     'operation': 'create_table',
                     'table_name': table_name,
                     'sql': sql,
-                    'result': result,
                     'message': f'成功创建表 {table_name}，包含 {len(fields)} 个字段'
                 }
         
@@ -205,8 +238,8 @@ class NaturalLanguageProcessor:
             'error': f'无法解析创建表命令: {query}'
         }
     
-    def _handle_insert(self, query: str, agent_id: str) -> Dict[str, Any]:
-        """处理插入操作"""
+    def _plan_insert(self, query: str) -> Dict[str, Any]:
+        """解析插入命令并生成SQL（不执行）"""
         for pattern in self.table_patterns['insert']:
             match = re.search(pattern, query, re.IGNORECASE)
             if match:
@@ -224,15 +257,11 @@ class NaturalLanguageProcessor:
                 # 生成SQL
                 sql = self._generate_insert_sql(table_name, data)
                 
-                # 执行SQL
-                result = self.db_adapter.execute_sql(sql, agent_id)
-                
                 return {
                     'success': True,
                     'operation': 'insert',
                     'table_name': table_name,
                     'sql': sql,
-                    'result': result,
                     'message': f'成功向表 {table_name} 插入数据'
                 }
         
@@ -241,8 +270,8 @@ class NaturalLanguageProcessor:
             'error': f'无法解析插入命令: {query}'
         }
     
-    def _handle_select(self, query: str, agent_id: str) -> Dict[str, Any]:
-        """处理查询操作"""
+    def _plan_select(self, query: str) -> Dict[str, Any]:
+        """解析查询命令并生成SQL（不执行）"""
         for pattern in self.table_patterns['select']:
             match = re.search(pattern, query, re.IGNORECASE)
             if match:
@@ -255,15 +284,11 @@ class NaturalLanguageProcessor:
                 # 生成SQL
                 sql = self._generate_select_sql(table_name, fields)
                 
-                # 执行SQL
-                result = self.db_adapter.execute_sql(sql, agent_id)
-                
                 return {
                     'success': True,
                     'operation': 'select',
                     'table_name': table_name,
                     'sql': sql,
-                    'result': result,
                     'message': f'成功查询表 {table_name}'
                 }
         
@@ -272,8 +297,8 @@ class NaturalLanguageProcessor:
             'error': f'无法解析查询命令: {query}'
         }
     
-    def _handle_update(self, query: str, agent_id: str) -> Dict[str, Any]:
-        """处理更新操作"""
+    def _plan_update(self, query: str) -> Dict[str, Any]:
+        """解析更新命令并生成SQL（不执行）"""
         for pattern in self.table_patterns['update']:
             match = re.search(pattern, query, re.IGNORECASE)
             if match:
@@ -294,15 +319,11 @@ class NaturalLanguageProcessor:
                 # 生成SQL
                 sql = self._generate_update_sql(table_name, set_data, where_condition)
                 
-                # 执行SQL
-                result = self.db_adapter.execute_sql(sql, agent_id)
-                
                 return {
                     'success': True,
                     'operation': 'update',
                     'table_name': table_name,
                     'sql': sql,
-                    'result': result,
                     'message': f'成功更新表 {table_name}'
                 }
         
@@ -311,8 +332,8 @@ class NaturalLanguageProcessor:
             'error': f'无法解析更新命令: {query}'
         }
     
-    def _handle_delete(self, query: str, agent_id: str) -> Dict[str, Any]:
-        """处理删除操作"""
+    def _plan_delete(self, query: str) -> Dict[str, Any]:
+        """解析删除命令并生成SQL（不执行）"""
         for pattern in self.table_patterns['delete']:
             match = re.search(pattern, query, re.IGNORECASE)
             if match:
@@ -325,15 +346,11 @@ class NaturalLanguageProcessor:
                 # 生成SQL
                 sql = self._generate_delete_sql(table_name, where_condition)
                 
-                # 执行SQL
-                result = self.db_adapter.execute_sql(sql, agent_id)
-                
                 return {
                     'success': True,
                     'operation': 'delete',
                     'table_name': table_name,
                     'sql': sql,
-                    'result': result,
                     'message': f'成功删除表 {table_name} 中的数据'
                 }
         
@@ -476,5 +493,19 @@ def natural_language_query(query: str, db_manager, agent_id: str = "nl_agent") -
     Returns:
         查询结果
     """
-    processor = NaturalLanguageProcessor(db_manager)
-    return processor.process_natural_language(query, agent_id) 
\ No newline at end of file
+    # 解析结果只取决于查询文本，重复的问法直接复用；SQL每次都重新执行（数据可能已变化，写操作也必须执行）
+    # 未加引号的值也是数据，只去掉首尾空白（translate同样会去掉），不折叠中间空白
+    plan = _translate_cached(query.strip())
+    return NaturalLanguageProcessor(db_manager).execute_plan(plan, agent_id)
+
+
+@lru_cache(maxsize=1)
+def _get_translator() -> NaturalLanguageProcessor:
+    """获取共享的解析器（只用于translate，不绑定数据库）"""
+    return NaturalLanguageProcessor(None)
+
+
+@lru_cache(maxsize=512)
+def _translate_cached(query: str) -> Dict[str, Any]:
+    """缓存自然语言查询的解析结果（调用方不得修改返回的dict）"""
+    return _get_translator().translate(query)
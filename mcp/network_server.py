@@ -13,7 +13,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import uvicorn
-from database.connection import db_manager, thread_safe_db_manager
+from database.connection import get_db_manager, get_thread_safe_db_manager
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -34,7 +34,7 @@ class MCPNetworkServer:
         """初始化MCP网络服务器"""
         self.agent_id = agent_id or str(uuid.uuid4())
         self.use_thread_safe = use_thread_safe
-        self.db_manager = thread_safe_db_manager if use_thread_safe else db_manager
+        self.db_manager = get_thread_safe_db_manager() if use_thread_safe else get_db_manager()
         
         # 标准MCP协议属性
         self.server_name = "sqlite-mcp-server"
@@ -0,0 +1,45 @@
+"""
+数据库连接管理器测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from database.connection import ThreadSafeDatabaseManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class InitSentinelTest(unittest.TestCase):
+    """初始化标记测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def test_sentinel_written_after_successful_repair(self):
+        """修复成功后写入初始化标记"""
+        os.chdir(ROOT)
+        manager = ThreadSafeDatabaseManager(self.db_path)
+        manager.close()
+
+        self.assertTrue(os.path.exists(self.db_path + ".initialized"))
+
+    def test_no_sentinel_when_repair_fails(self):
+        """必要表缺失且修复失败时不写入初始化标记，下次启动仍会重新检查"""
+        # 在临时目录中启动，相对路径的修复脚本无法找到
+        os.chdir(self.tmpdir.name)
+        manager = ThreadSafeDatabaseManager(self.db_path)
+        manager.close()
+
+        self.assertFalse(os.path.exists(self.db_path + ".initialized"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+增强版MCP服务器stdio模式测试
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_SERVER = (
+    "import asyncio\n"
+    "from mcp.enhanced_server import create_enhanced_server\n"
+    "asyncio.run(create_enhanced_server().run())\n"
+)
+
+
+def _request(request_id, method, params=None):
+    """构造一行JSON-RPC请求"""
+    request = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        request["params"] = params
+    return json.dumps(request)
+
+
+def _tool_call(request_id, name, arguments):
+    """构造一行工具调用请求"""
+    return _request(request_id, "tools/call", {"name": name, "arguments": arguments})
+
+
+class StdioPipelineTest(unittest.TestCase):
+    """stdio请求流水线测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "test.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _run(self, lines):
+        """一次性写入全部请求行，返回按id索引的响应"""
+        env = dict(os.environ, DATABASE_PATH=self.db_path, USE_THREAD_SAFE="true", PYTHONPATH=ROOT)
+        proc = subprocess.run(
+            [sys.executable, "-c", RUN_SERVER],
+            input="\n".join(lines) + "\n",
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            env=env,
+            timeout=60,
+        )
+        responses = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+        return {response.get("id"): response for response in responses}
+
+    def test_read_after_pipelined_write_sees_write(self):
+        """流水线中写工具之后的读请求能读到写入结果"""
+        responses = self._run([
+            _request(1, "initialize", {}),
+            _tool_call(2, "create_table", {"table_name": "items", "columns": "id INTEGER PRIMARY KEY, name TEXT"}),
+            _tool_call(3, "sql_update", {"query": "INSERT INTO items(name) VALUES (?)", "params": ["a"]}),
+            _tool_call(4, "sql_query", {"query": "SELECT name FROM items"}),
+        ])
+
+        self.assertNotIn("error", responses[3])
+        read = responses[4]
+        self.assertNotIn("error", read)
+        self.assertIn('"a"', read["result"]["content"][0]["text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+多Agent数据库管理器测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from database.multi_agent_manager import ConsistencyManager, MultiAgentDatabaseManager
+
+
+class TransactionTest(unittest.TestCase):
+    """事务执行测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = MultiAgentDatabaseManager(os.path.join(self.tmpdir.name, "test.db"), "agent_test")
+        self.assertTrue(self.manager.execute_transaction_with_isolation([
+            ("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)", ()),
+        ]))
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmpdir.cleanup()
+
+    def test_repeated_inserts_are_batched(self):
+        """连续相同的INSERT语句全部执行"""
+        query = "INSERT INTO items (name) VALUES (?)"
+        self.assertTrue(self.manager.execute_transaction_with_isolation([
+            (query, ("a",)), (query, ("b",)), (query, ("c",)),
+        ]))
+
+        rows = self.manager.execute_query_with_consistency("SELECT name FROM items ORDER BY id")
+        self.assertEqual([row["name"] for row in rows], ["a", "b", "c"])
+
+    def test_repeated_selects_in_transaction(self):
+        """连续相同的SELECT语句不走executemany，事务正常提交"""
+        query = "SELECT name FROM items WHERE id = ?"
+        self.assertTrue(self.manager.execute_transaction_with_isolation([
+            ("INSERT INTO items (name) VALUES (?)", ("a",)),
+            (query, (1,)),
+            (query, (1,)),
+        ]))
+
+        rows = self.manager.execute_query_with_consistency("SELECT name FROM items")
+        self.assertEqual([row["name"] for row in rows], ["a"])
+
+
+class ConsistencyCacheTest(unittest.TestCase):
+    """一致性缓存测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = MultiAgentDatabaseManager(os.path.join(self.tmpdir.name, "test.db"), "agent_test")
+        self.assertTrue(self.manager.execute_transaction_with_isolation([
+            ("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, version INTEGER)", ()),
+            ("CREATE TABLE tags (item_id INTEGER, tag TEXT)", ()),
+            ("INSERT INTO items (name, version) VALUES ('a', 1)", ()),
+            ("INSERT INTO tags (item_id, tag) VALUES (1, 'x')", ()),
+        ]))
+        self.consistency = ConsistencyManager(self.manager)
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmpdir.cleanup()
+
+    def test_update_invalidates_multi_table_query(self):
+        """更新多表查询涉及的任一表后，再次读取得到最新数据"""
+        query = "SELECT items.name, tags.tag FROM items JOIN tags ON tags.item_id = items.id"
+        rows = self.consistency.read_with_cache_validation(query, cache_key="joined")
+        self.assertEqual(rows, [{"name": "a", "tag": "x"}])
+
+        self.assertTrue(self.consistency.update_with_version_check(
+            "UPDATE items SET name = ?, version = ? WHERE id = ?", ("b",), "items", 1
+        ))
+
+        rows = self.consistency.read_with_cache_validation(query, cache_key="joined")
+        self.assertEqual(rows, [{"name": "b", "tag": "x"}])
+
+
+class TransactionLogTest(unittest.TestCase):
+    """事务日志测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manager = MultiAgentDatabaseManager(os.path.join(self.tmpdir.name, "test.db"), "agent_test")
+
+    def tearDown(self):
+        self.manager.close()
+        self.tmpdir.cleanup()
+
+    def test_unencodable_record_is_dropped(self):
+        """无法编码的记录被丢弃，其他记录照常写入"""
+        class Unprintable:
+            """SQLite可以绑定，但无法转换为文本写入日志的参数"""
+
+            def __conform__(self, protocol):
+                return "a"
+
+            def __str__(self):
+                raise RuntimeError("cannot encode")
+
+        self.manager.execute_query_with_consistency("SELECT ? AS value", (Unprintable(),))
+        self.manager.execute_query_with_consistency("SELECT ? AS value", ("b",))
+
+        history = self.manager.get_transaction_history(10)
+        self.assertEqual([record["params"] for record in history], [["b"]])
+
+
+if __name__ == "__main__":
+    unittest.main()